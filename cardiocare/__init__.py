@@ -0,0 +1 @@
+"""CardioCare AI scoring core, importable without the Streamlit UI."""
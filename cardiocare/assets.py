@@ -0,0 +1,58 @@
+"""Stylesheets and static HTML of the Streamlit apps.
+
+Every rerun sends each ``st.markdown`` element to the browser again, so the
+apps keep their static parts out of the script:
+
+- Stylesheets live in ``static/`` and are linked, not inlined. Streamlit
+  serves that directory at ``app/static/`` when ``server.enableStaticServing``
+  is on (see ``.streamlit/config.toml``); the browser fetches a stylesheet
+  once and the rerun only carries the ``<link>`` tag. With static serving
+  off, the stylesheet is inlined as before. Streamlit sends ``.css`` files as
+  ``text/css`` from 1.56 on (``requirements.txt``); earlier releases send them
+  as ``text/plain``, which browsers refuse to apply.
+- Static pages and blocks live in ``templates/`` and are read once per
+  process. Each is sent as one element, so that Streamlit's message cache
+  (``global.minCachedMessageSize``) can replace it on later reruns with a
+  reference to the copy the browser already has.
+
+Measure the effect with ``python -m cardiocare.egress hp.py``.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
+# Relative to the app's URL, so it also works under server.baseUrlPath
+STATIC_URL = "app/static"
+
+
+@lru_cache(maxsize=None)
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def stylesheet(name, static_serving=True):
+    """HTML that applies ``static/<name>``: a ``<link>`` when served, else a ``<style>`` block.
+
+    The link carries a content hash so browsers refetch the file when it changes.
+    """
+    css = _read(os.path.join(STATIC_DIR, name))
+    if static_serving:
+        version = hashlib.sha256(css.encode()).hexdigest()[:12]
+        return f'<link rel="stylesheet" href="{STATIC_URL}/{name}?v={version}">'
+    return f"<style>\n{css}</style>"
+
+
+@lru_cache(maxsize=None)
+def template(name):
+    """``templates/<name>`` without indentation or blank lines.
+
+    Indentation is dead weight on every rerun, and a blank line would end the
+    HTML block in Streamlit's Markdown renderer.
+    """
+    lines = (line.strip() for line in _read(os.path.join(TEMPLATE_DIR, name)).splitlines())
+    return "\n".join(line for line in lines if line)
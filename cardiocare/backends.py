@@ -0,0 +1,337 @@
+"""Pluggable inference backends for the early-warning and heart-disease models.
+
+Every backend returns a :class:`~cardiocare.fused.FusedModel`: the scaler's
+``mean_``/``scale_`` in float64 in front of an object whose
+``inplace_predict(float32 rows)`` returns positive-class probabilities.
+
+``joblib``
+    The pickled ``XGBClassifier`` via ``predict_proba`` (the original path).
+``native``
+    The XGBoost booster from ``exported_models/*.ubj`` (see ``cardiocare.native``).
+``onnx``
+    The booster converted to ONNX and run by ONNX Runtime on the CPU.
+``treelite``
+    The booster compiled to a shared library by Treelite/TL2cgen (needs gcc).
+
+``onnx`` needs ``onnxruntime`` and ``onnxmltools``; ``treelite`` needs
+``treelite`` and ``tl2cgen``. Their converted or compiled models are cached in
+``CARDIOCARE_COMPILE_DIR`` by artifact version, so the conversion (about 6 s of
+compiling for Treelite) is paid once per model version and host.
+
+``load_model`` checks every backend against a golden sample of the bundled CSVs
+scored by the joblib path, and raises :class:`BackendParityError` if the
+probabilities or labels disagree.
+
+Usage::
+
+    CARDIOCARE_BACKEND=onnx streamlit run hp.py
+    python -m cardiocare.backends golden     # rewrite exported_models/golden_sample.npz after retraining
+    python -m cardiocare.backends check      # parity of every backend against the golden sample
+    python -m cardiocare.backends bench      # load time and latency by backend
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from cardiocare.features import schema_for
+from cardiocare.fused import BUNDLED_CSVS, FusedModel
+from cardiocare.models import MODEL_DIR, MODEL_FILES, ModelRegistry, model_threshold
+from cardiocare.native import NATIVE_SOURCES
+
+BACKEND = os.environ.get("CARDIOCARE_BACKEND", "native")
+BACKEND_THREADS = int(os.environ.get("CARDIOCARE_BACKEND_THREADS", 1))
+COMPILE_DIR = os.environ.get("CARDIOCARE_COMPILE_DIR") or os.path.join(tempfile.gettempdir(), "cardiocare-compiled")
+
+GOLDEN_SAMPLE = os.path.join(MODEL_DIR, "golden_sample.npz")
+GOLDEN_ROWS = 512
+# Default golden_path: the sample next to the models being checked
+_REGISTRY_GOLDEN = object()
+# float32 tree evaluation in a different order than XGBoost's own differs by ~1e-7
+PARITY_ATOL = float(os.environ.get("CARDIOCARE_PARITY_ATOL", 1e-5))
+
+# Model -> native artifact (whose NATIVE_SOURCES entry names the joblib model and scaler)
+MODELS = {
+    "early": "early_native",
+    "hd": "hd_native"
+}
+
+
+class BackendParityError(RuntimeError):
+    """A backend's predictions differ from the golden sample."""
+
+
+# === BACKENDS ===
+class _EstimatorPredictor:
+    def __init__(self, model):
+        self.model = model
+
+    def inplace_predict(self, scaled):
+        return self.model.predict_proba(scaled)[:, 1]
+
+
+class _OnnxPredictor:
+    def __init__(self, path, threads=BACKEND_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def inplace_predict(self, scaled):
+        return self.session.run(["probabilities"], {self.input_name: scaled})[0][:, 1]
+
+
+class _TreelitePredictor:
+    def __init__(self, path, threads=BACKEND_THREADS):
+        import tl2cgen
+
+        self._dmatrix = tl2cgen.DMatrix
+        self.predictor = tl2cgen.Predictor(path, nthread=threads)
+
+    def inplace_predict(self, scaled):
+        return self.predictor.predict(self._dmatrix(scaled)).reshape(-1)
+
+
+def _import(*modules):
+    try:
+        return [__import__(module) for module in modules]
+    except ImportError as e:
+        raise ImportError(f"This backend needs {' and '.join(modules)}: pip install {' '.join(modules)}") from e
+
+
+def _compiled(version, suffix, build):
+    """Path of the cached ``{version}{suffix}`` in ``COMPILE_DIR``, built by ``build(path)`` if missing.
+
+    Builds into a private directory and renames, so concurrent workers never
+    load a partly written file.
+    """
+    path = os.path.join(COMPILE_DIR, f"{version}{suffix}")
+    if not os.path.exists(path):
+        os.makedirs(COMPILE_DIR, exist_ok=True)
+        build_dir = tempfile.mkdtemp(dir=COMPILE_DIR)
+        try:
+            tmp_path = os.path.join(build_dir, os.path.basename(path))
+            build(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+    return path
+
+
+def _joblib(registry, native_name):
+    model_name, scaler_name = NATIVE_SOURCES[native_name]
+    scaler = registry.get(scaler_name)
+    return FusedModel(_EstimatorPredictor(registry.get(model_name)), scaler.mean_, scaler.scale_,
+                      schema_for(scaler), model_threshold(model_name, registry.base_dir))
+
+
+def _native(registry, native_name):
+    return registry.get(native_name)
+
+
+def _onnx(registry, native_name):
+    _, onnxmltools = _import("onnxruntime", "onnxmltools")
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    native = registry.get(native_name)
+
+    def convert(path):
+        booster = native.booster.copy()
+        booster.feature_names = None
+        onnx_model = onnxmltools.convert_xgboost(
+            booster, initial_types=[("input", FloatTensorType([None, len(native.feature_names)]))], target_opset=15)
+        with open(path, "wb") as f:
+            f.write(onnx_model.SerializeToString())
+
+    path = _compiled(registry.version(native_name), ".onnx", convert)
+    return FusedModel(_OnnxPredictor(path), native.mean, native.scale, native.schema, native.threshold)
+
+
+def _treelite(registry, native_name):
+    treelite, tl2cgen = _import("treelite", "tl2cgen")
+    native = registry.get(native_name)
+
+    def compile_lib(path):
+        tl2cgen.export_lib(treelite.frontend.from_xgboost(native.booster), toolchain="gcc", libpath=path,
+                           params={"parallel_comp": 8}, nthread=1)
+
+    path = _compiled(registry.version(native_name), ".so", compile_lib)
+    return FusedModel(_TreelitePredictor(path), native.mean, native.scale, native.schema, native.threshold)
+
+
+# Backend -> (build(registry, native artifact) -> FusedModel, registry artifacts it reads)
+BACKENDS = {
+    "joblib": (_joblib, lambda native_name: NATIVE_SOURCES[native_name]),
+    "native": (_native, lambda native_name: (native_name,)),
+    "onnx": (_onnx, lambda native_name: (native_name,)),
+    "treelite": (_treelite, lambda native_name: (native_name,))
+}
+
+
+def _backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[backend]
+
+
+def backend_artifacts(backend=BACKEND, models=tuple(MODELS)):
+    """Registry artifacts that ``backend`` loads for ``models``, e.g. for ``ModelRegistry.warm``."""
+    artifacts = _backend(backend)[1]
+    return [artifact for name in models for artifact in artifacts(MODELS[name])]
+
+
+def model_version(registry, name, backend=BACKEND):
+    """Cache key of model ``name`` under ``backend``: the backend plus the content hash of its artifacts."""
+    return f"{backend}-{registry.version(*backend_artifacts(backend, [name]))}"
+
+
+def load_model(registry, name, backend=BACKEND, golden_path=_REGISTRY_GOLDEN, atol=PARITY_ATOL):
+    """Build model ``name`` (``"early"`` or ``"hd"``) on ``backend`` and check it against the golden sample.
+
+    The sample defaults to the one in ``registry.base_dir``. Raises
+    :class:`BackendParityError` if it disagrees with the sample (or the sample
+    was drawn for other artifacts); pass ``golden_path=None`` to skip the check.
+    """
+    fused = _backend(backend)[0](registry, MODELS[name])
+    if golden_path is _REGISTRY_GOLDEN:
+        golden_path = golden_sample_path(registry.base_dir)
+    if golden_path is not None:
+        check_parity(fused, registry, name, golden_path, atol, backend)
+    return fused
+
+
+# === GOLDEN SAMPLE ===
+def golden_sample_path(base_dir=MODEL_DIR):
+    """The golden sample of the models in ``base_dir``."""
+    return os.path.join(base_dir, os.path.basename(GOLDEN_SAMPLE))
+
+
+def write_golden(base_dir=MODEL_DIR, path=None, rows=GOLDEN_ROWS, seed=42, csv_paths=BUNDLED_CSVS):
+    """Score ``rows`` random rows of the bundled CSVs with the joblib path and save them to ``path``.
+
+    ``path`` defaults to :func:`golden_sample_path` of ``base_dir``. Each model
+    draws from the CSVs that have all of its feature columns. The sample
+    records the content hash of the joblib artifacts it was scored with.
+    """
+    path = path or golden_sample_path(base_dir)
+    registry = ModelRegistry(base_dir, {name: MODEL_FILES[name] for name in backend_artifacts("joblib")})
+    arrays = {}
+    for name, native_name in MODELS.items():
+        fused = _joblib(registry, native_name)
+        frames = [df for df in map(pd.read_csv, csv_paths) if set(fused.feature_names).issubset(df.columns)]
+        sample = pd.concat(frames, ignore_index=True).sample(n=rows, random_state=seed)
+        X = fused.schema.encode_frame(sample)
+        model_name, scaler_name = NATIVE_SOURCES[native_name]
+        scaled = registry.get(scaler_name).transform(pd.DataFrame(X, columns=fused.feature_names))
+        arrays[f"{name}_X"] = X
+        arrays[f"{name}_probability"] = registry.get(model_name).predict_proba(scaled)[:, 1]
+        arrays[f"{name}_version"] = np.array(registry.version(model_name, scaler_name))
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def check_parity(fused, registry, name, golden_path=_REGISTRY_GOLDEN, atol=PARITY_ATOL, backend=BACKEND):
+    """Max absolute probability difference of ``fused`` on the golden sample of model ``name``.
+
+    The sample defaults to the one in ``registry.base_dir``. Raises :class:`BackendParityError` if it exceeds ``atol``, if a label
+    differs for a row further than ``atol`` from the threshold, or if the
+    sample was drawn for other joblib artifacts than ``registry`` holds.
+    """
+    if golden_path is _REGISTRY_GOLDEN:
+        golden_path = golden_sample_path(registry.base_dir)
+    if not os.path.exists(golden_path):
+        raise FileNotFoundError(f"Missing golden sample {golden_path}; run python -m cardiocare.backends golden")
+    with np.load(golden_path) as golden:
+        X, expected, version = golden[f"{name}_X"], golden[f"{name}_probability"], str(golden[f"{name}_version"])
+
+    model_name, scaler_name = NATIVE_SOURCES[MODELS[name]]
+    if version != registry.version(model_name, scaler_name):
+        raise BackendParityError(f"Golden sample for {name!r} was drawn for other model artifacts; "
+                                 "run python -m cardiocare.backends golden")
+
+    prob = fused.predict_proba(X)
+    diff = float(np.abs(prob - expected).max())
+    decisive = np.abs(expected - fused.threshold) > atol
+    flipped = int((fused.label(prob) != fused.label(expected))[decisive].sum())
+    if diff > atol or flipped:
+        raise BackendParityError(f"{backend} backend for {name!r}: max |dp| = {diff:.3g} (atol {atol:g}), "
+                                 f"{flipped} of {len(X)} golden labels differ")
+    return diff
+
+
+# === BENCHMARK ===
+def benchmark(backends=tuple(BACKENDS), base_dir=MODEL_DIR, golden_path=_REGISTRY_GOLDEN, name="early", n=1000,
+              batch_rows=(1, 100, 10_000)):
+    """Build time, parity and p50 latency (ms) per backend for model ``name``.
+
+    Build time includes converting or compiling unless ``COMPILE_DIR`` already
+    holds the result.
+    """
+    data = None
+    results = {}
+    for backend in backends:
+        registry = ModelRegistry(base_dir)
+        start = time.perf_counter()
+        fused = load_model(registry, name, backend, golden_path=None)
+        results[backend] = {"build_s": time.perf_counter() - start,
+                            "max_diff": check_parity(fused, registry, name, golden_path, backend=backend)}
+
+        if data is None:
+            data = fused.schema.encode_frame(pd.read_csv(BUNDLED_CSVS[0]))
+        for rows in batch_rows:
+            X = fused.transform(np.resize(data, (rows, data.shape[1])))
+            timings = []
+            for _ in range(max(1, n // rows)):
+                start = time.perf_counter()
+                fused.predict_scaled(X)
+                timings.append(time.perf_counter() - start)
+            results[backend][f"p50_ms_{rows}"] = float(np.median(timings) * 1000)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or benchmark the inference backends.")
+    parser.add_argument("command", choices=["golden", "check", "bench"])
+    parser.add_argument("--backend", action="append", choices=list(BACKENDS),
+                        help="Backend to check or benchmark (repeatable; default: all)")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args(argv)
+    backends = args.backend or list(BACKENDS)
+    golden_path = golden_sample_path(args.model_dir)
+
+    if args.command == "golden":
+        write_golden(args.model_dir, golden_path)
+        print(f"Wrote {golden_path} ({GOLDEN_ROWS} rows per model)")
+        return 0
+
+    if args.command == "check":
+        ok = True
+        registry = ModelRegistry(args.model_dir)
+        for backend in backends:
+            for name in MODELS:
+                try:
+                    fused = load_model(registry, name, backend, golden_path=None)
+                    diff = check_parity(fused, registry, name, golden_path, backend=backend)
+                    print(f"{backend:9s} {name:6s} max |dp| = {diff:.3g}")
+                except (BackendParityError, ImportError) as e:
+                    ok = False
+                    print(f"{backend:9s} {name:6s} FAILED: {e}")
+        return 0 if ok else 1
+
+    for backend, stats in benchmark(backends, args.model_dir, golden_path).items():
+        latencies = "   ".join(f"{key[7:]} rows {value:.3f} ms" for key, value in stats.items() if key.startswith("p50"))
+        print(f"{backend:9s} build {stats['build_s'] * 1000:8.1f} ms   max |dp| {stats['max_diff']:.2g}   "
+              f"p50: {latencies}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Micro-batching of concurrent predictions.
+
+Each single-row ``predict_proba`` call pays XGBoost's fixed per-call overhead.
+:class:`MicroBatcher` queues rows from any number of threads, and a background
+thread stacks whatever arrives within ``max_wait_ms`` (up to ``max_rows``) into
+one call and hands each caller its slice of the result. Streamlit sessions
+call it from their script threads; async code awaits ``submit()`` through
+``asyncio.wrap_future``.
+
+Usage::
+
+    python -m cardiocare.batching    # throughput vs latency by concurrency
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+BATCH_MAX_ROWS = int(os.environ.get("CARDIOCARE_BATCH_MAX_ROWS", 64))
+# A non-zero wait only pays off once concurrent load fills batches; at lower
+# load every request would wait the full time (see the benchmark)
+BATCH_MAX_WAIT_MS = float(os.environ.get("CARDIOCARE_BATCH_MAX_WAIT_MS", 0))
+
+
+class MicroBatcher:
+    """Coalesce concurrent calls of ``predict(X) -> probabilities`` into batches.
+
+    The first queued request opens a batch; the batch is run once it holds
+    ``max_rows`` rows or ``max_wait_ms`` has passed, so a request waits at most
+    ``max_wait_ms`` plus the batch's own predict time. With ``max_wait_ms=0``
+    only requests that are already queued are coalesced.
+
+    ``submit`` can name another predict function for its rows, e.g. the next
+    version of a model. Rows are only batched with rows for the same function,
+    so one batcher serves every version without mixing them.
+    """
+
+    def __init__(self, predict, max_rows=BATCH_MAX_ROWS, max_wait_ms=BATCH_MAX_WAIT_MS, name="cardiocare-batcher"):
+        self.predict_fn = predict
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._closed = False
+        self.batches = 0
+        self.rows = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, X, predict_fn=None):
+        """Queue the rows of ``X`` and return a ``Future`` of their probabilities.
+
+        The rows are scored by ``predict_fn``, by default the batcher's own.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((np.atleast_2d(X), future, predict_fn or self.predict_fn))
+        return future
+
+    def predict(self, X, timeout=None, predict_fn=None):
+        """Blocking ``submit(X, predict_fn).result()``."""
+        return self.submit(X, predict_fn).result(timeout)
+
+    def close(self):
+        """Run the requests already queued, then stop the batching thread."""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_rows": self.rows / self.batches if self.batches else None
+        }
+
+    def _run(self):
+        pending = self._queue.get()
+        while pending is not None:
+            X, future, predict = pending
+            batch, rows = [(X, future)], len(X)
+            deadline = time.perf_counter() + self.max_wait
+            pending = False
+            while rows < self.max_rows:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None or item[2] != predict:
+                    # Stop after this batch, or open the next one with rows for another function
+                    pending = item
+                    break
+                batch.append(item[:2])
+                rows += len(item[0])
+            self._flush(batch, predict)
+            if pending is False:
+                pending = self._queue.get()
+
+    def _flush(self, batch, predict):
+        batch = [(X, future) for X, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            X = batch[0][0] if len(batch) == 1 else np.vstack([X for X, _ in batch])
+            prob = predict(X)
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(X)
+        start = 0
+        for X_i, future in batch:
+            future.set_result(prob[start:start + len(X_i)])
+            start += len(X_i)
+
+
+# === BENCHMARK ===
+def benchmark(concurrency_levels=(1, 8, 32, 64), requests_per_thread=200, waits_ms=(0, 2, 5), max_rows=64):
+    """Single-row throughput and latency, direct vs batched, at each concurrency level.
+
+    Returns ``[(concurrency, label, rows_per_sec, p50_ms, p99_ms, mean_batch_rows)]``.
+    """
+    import pandas as pd
+
+    from cardiocare.fused import BUNDLED_CSVS, FusedModel
+    from cardiocare.models import load_artifacts
+
+    early_model, _, scaler, _ = load_artifacts()
+    fused = FusedModel.from_artifacts(early_model, scaler)
+    rows = fused.transform(fused.schema.encode_frame(pd.read_csv(BUNDLED_CSVS[0], nrows=1000)))
+
+    def run(concurrency, predict):
+        latencies = [[] for _ in range(concurrency)]
+
+        def worker(i):
+            for j in range(requests_per_thread):
+                row = rows[(i * requests_per_thread + j) % len(rows)][None, :]
+                start = time.perf_counter()
+                predict(row)
+                latencies[i].append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        seconds = time.perf_counter() - start
+        p50, p99 = np.percentile(np.concatenate(latencies), [50, 99]) * 1000
+        return concurrency * requests_per_thread / seconds, p50, p99
+
+    results = []
+    for concurrency in concurrency_levels:
+        results.append((concurrency, "direct", *run(concurrency, fused.predict_scaled), 1.0))
+        for wait_ms in waits_ms:
+            batcher = MicroBatcher(fused.predict_scaled, max_rows=max_rows, max_wait_ms=wait_ms)
+            stats = run(concurrency, batcher.predict)
+            batcher.close()
+            results.append((concurrency, f"batched {wait_ms:g} ms", *stats, batcher.stats()["mean_batch_rows"]))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched vs direct single-row scoring.")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="Comma-separated thread counts")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per thread")
+    parser.add_argument("--waits", default="0,2,5", help="Comma-separated max_wait_ms values")
+    parser.add_argument("--max-rows", type=int, default=BATCH_MAX_ROWS)
+    args = parser.parse_args(argv)
+
+    results = benchmark([int(c) for c in args.concurrency.split(",")], args.requests,
+                        [float(w) for w in args.waits.split(",")], args.max_rows)
+    print(f"{'threads':>7s}  {'mode':14s} {'rows/s':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'rows/batch':>10s}")
+    for concurrency, label, rows_per_sec, p50, p99, batch_rows in results:
+        print(f"{concurrency:7d}  {label:14s} {rows_per_sec:9,.0f} {p50:8.2f} {p99:8.2f} {batch_rows:10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Benchmark suite with stored results and regression checks.
+
+Each case is a setup function that prepares its inputs and returns the
+callable to time. A case is calibrated to run for at least ``MIN_ROUND_TIME``
+per round and timed over several rounds. The min, median, mean and standard
+deviation per call are written to ``.benchmarks/<timestamp>_<commit>.json``,
+the layout pytest-benchmark uses. ``compare`` flags every case whose median
+got slower than the baseline by more than the threshold.
+
+Cases: cold ``load_models``, form encoding, scaler + model for 1 to 1M rows on
+the configured backend (``CARDIOCARE_BACKEND``), chart build + serialize, PDF
+rendering and Patient History DataFrames at 1k/100k rows. Larger inputs come
+from ``cardiocare.synthetic``.
+
+Usage::
+
+    python -m cardiocare.benchmarks run                          # all cases
+    python -m cardiocare.benchmarks run -k predict --compare latest
+    python -m cardiocare.benchmarks compare .benchmarks/A.json .benchmarks/B.json --threshold 0.1
+"""
+import argparse
+import atexit
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cardiocare.fused import DATA_DIR
+
+RESULTS_DIR = os.path.join(DATA_DIR, ".benchmarks")
+MIN_ROUND_TIME = 0.2
+ROUNDS = 5
+# Slowdown of the median (as a fraction of the baseline) reported as a regression
+REGRESSION_THRESHOLD = 0.2
+
+PREDICT_ROWS = (1, 100, 10_000, 1_000_000)
+HISTORY_ROWS = (1_000, 100_000)
+
+
+# === CASES ===
+def _cold_start():
+    code = ("from cardiocare.backends import load_model; from cardiocare.models import ModelRegistry; "
+            "registry = ModelRegistry(); load_model(registry, 'early'); load_model(registry, 'hd')")
+
+    def run():
+        subprocess.run([sys.executable, "-W", "ignore", "-c", code], check=True, cwd=DATA_DIR,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return run
+
+
+def _form(schema):
+    # What the assessment form submits: labels for categorical features, numbers otherwise
+    return {f.name: f.choices[-1] if f.choices else f.default for f in schema.features}
+
+
+def _encode(name):
+    from cardiocare.features import EARLY_SCHEMA, HEART_DISEASE_SCHEMA
+
+    schema = EARLY_SCHEMA if name == "early" else HEART_DISEASE_SCHEMA
+    form = _form(schema)
+    return lambda: schema.encode_row(form)
+
+
+def _predict(name, rows):
+    from cardiocare.backends import load_model
+    from cardiocare.models import ModelRegistry
+    from cardiocare.synthetic import generate_chunk
+
+    fused = load_model(ModelRegistry(), name)
+    # Cohort of the schema the artifact was trained on, which need not match the model's name
+    cohort = "hd" if fused.schema.name == "heart_disease" else "early"
+    X = fused.schema.encode_frame(generate_chunk(cohort, rows, 0))
+    return lambda: fused.predict_proba(X)
+
+
+def _gauge():
+    import plotly.io as pio
+    from cardiocare.charts import create_risk_gauge
+
+    return lambda: pio.to_json(create_risk_gauge(0.42, "Cardiovascular Risk Gauge"), validate=False)
+
+
+def _rainbow():
+    import plotly.io as pio
+    from cardiocare.charts import create_rainbow_bar_chart
+
+    factors = ['Smoking', 'BMI', 'Activity', 'Alcohol', 'Diet', 'Stress']
+    values = [0.8, 0.3, 0.7, 0.0, 0.2, 0.1]
+    return lambda: pio.to_json(create_rainbow_bar_chart(factors, values, "Modifiable Risk Factors"), validate=False)
+
+
+def _pdf(mode):
+    import warnings
+
+    from cardiocare.features import EARLY_SCHEMA, HEART_DISEASE_SCHEMA
+    from cardiocare.reports import REPORT_FEATURES, generate_pdf_report, recommendations
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    schema = EARLY_SCHEMA if mode == "Early Warning" else HEART_DISEASE_SCHEMA
+    form = _form(schema)
+    patient_info = {"Patient ID": "P-0001", "Patient Name": "Benchmark Patient",
+                    **schema.describe(form, REPORT_FEATURES[mode][1])}
+    prediction_info = {"prediction": 1, "probability": 0.73, "recommendations": recommendations(mode, 1, form)}
+    return lambda: generate_pdf_report(patient_info, prediction_info, mode)
+
+
+def _history_frame(rows):
+    from cardiocare.history import HistoryStore
+
+    directory = tempfile.mkdtemp(prefix="cardiocare-bench-")
+    atexit.register(shutil.rmtree, directory, True)
+    store = HistoryStore(os.path.join(directory, "history.db"))
+    rs = np.random.RandomState(0)
+    probability = rs.random_sample(rows)
+    store.add_many({
+        "id": f"P{i % 1000:04d}", "name": f"Patient {i % 1000}", "age": int(25 + i % 55),
+        "sex": "Male" if i % 2 else "Female", "risk_level": "High" if p > 0.5 else "Low", "probability": float(p),
+        "timestamp": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}",
+        "mode": "Early Warning" if i % 3 else "Heart Disease"
+    } for i, p in enumerate(probability))
+    return store.frame
+
+
+def cases():
+    """``[(name, group, setup)]``; ``setup()`` returns the callable to time."""
+    registered = [("load_models[cold]", "load", _cold_start)]
+    for name in ("early", "hd"):
+        registered.append((f"encode_form[{name}]", "encode", lambda name=name: _encode(name)))
+    for name in ("early", "hd"):
+        for rows in PREDICT_ROWS:
+            registered.append((f"predict[{name}-{rows}]", "predict",
+                               lambda name=name, rows=rows: _predict(name, rows)))
+    registered.append(("chart[gauge]", "charts", _gauge))
+    registered.append(("chart[rainbow]", "charts", _rainbow))
+    for mode, label in (("Early Warning", "early"), ("Heart Disease", "hd")):
+        registered.append((f"pdf[{label}]", "pdf", lambda mode=mode: _pdf(mode)))
+    for rows in HISTORY_ROWS:
+        registered.append((f"history_frame[{rows}]", "history", lambda rows=rows: _history_frame(rows)))
+    return registered
+
+
+# === RUNNER ===
+def measure(fn, rounds=ROUNDS, min_round_time=MIN_ROUND_TIME):
+    """Per-call timing stats of ``fn`` over ``rounds`` rounds of calibrated iterations."""
+    start = time.perf_counter()
+    fn()
+    once = time.perf_counter() - start
+    iterations = max(1, int(min_round_time / once)) if once > 0 else 1000
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations)
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "stddev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": rounds,
+        "iterations": iterations
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=DATA_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(select=None, rounds=ROUNDS, progress=None):
+    """Run the cases whose name contains ``select`` (all by default) and return the results dict."""
+    import xgboost as xgb
+
+    from cardiocare.backends import BACKEND
+
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                    "numpy": np.__version__, "xgboost": xgb.__version__, "backend": BACKEND},
+        "benchmarks": {}
+    }
+    for name, group, setup in cases():
+        if select and select not in name:
+            continue
+        stats = measure(setup(), rounds)
+        results["benchmarks"][name] = {"group": group, **stats}
+        if progress is not None:
+            progress(name, stats)
+    return results
+
+
+def save(results, path=None):
+    """Write ``results`` to ``path`` (default: a new file in ``RESULTS_DIR``) and return the path."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = results["created"].replace(":", "").replace("-", "")[:15]
+        path = os.path.join(RESULTS_DIR, f"{stamp}_{results['commit'] or 'nocommit'}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def latest(exclude=None):
+    """Most recent results file in ``RESULTS_DIR`` other than ``exclude``, or ``None``."""
+    paths = sorted(path for path in glob.glob(os.path.join(RESULTS_DIR, "*.json"))
+                   if exclude is None or os.path.abspath(path) != os.path.abspath(exclude))
+    return paths[-1] if paths else None
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """``[(name, baseline median, current median, ratio, regressed)]`` for the cases both runs have."""
+    rows = []
+    for name, stats in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        before, after = baseline["benchmarks"][name]["median_s"], stats["median_s"]
+        ratio = after / before if before > 0 else float("inf")
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.0f} ns"
+
+
+def _print_comparison(rows, threshold):
+    print(f"\n{'case':28s} {'baseline':>11s} {'current':>11s} {'change':>8s}")
+    for name, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:28s} {_format_seconds(before)} {_format_seconds(after)} {ratio - 1:+8.1%}{flag}")
+    regressions = sum(regressed for *_, regressed in rows)
+    print(f"{regressions} of {len(rows)} cases slower than the baseline by more than {threshold:.0%}")
+    return regressions
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run or compare the CardioCare benchmark suite.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the suite and store the results as JSON")
+    run_parser.add_argument("-k", dest="select", help="Only cases whose name contains this string")
+    run_parser.add_argument("--rounds", type=int, default=ROUNDS)
+    run_parser.add_argument("--output", help=f"Results file (default: a new file in {RESULTS_DIR})")
+    run_parser.add_argument("--compare", help="Baseline results file, or 'latest'")
+    run_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+
+    compare_parser = sub.add_parser("compare", help="Compare two stored runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        rows = compare(_load(args.baseline), _load(args.current), args.threshold)
+        return 1 if _print_comparison(rows, args.threshold) else 0
+
+    def progress(name, stats):
+        print(f"{name:28s} median {_format_seconds(stats['median_s'])}   min {_format_seconds(stats['min_s'])}   "
+              f"({stats['rounds']} x {stats['iterations']})", flush=True)
+
+    results = run(args.select, args.rounds, progress)
+    path = save(results, args.output)
+    print(f"Wrote {path}")
+
+    if args.compare:
+        baseline = latest(exclude=path) if args.compare == "latest" else args.compare
+        if baseline is None:
+            print("No earlier results to compare against")
+            return 0
+        print(f"Baseline: {baseline}")
+        rows = compare(_load(baseline), results, args.threshold)
+        return 1 if _print_comparison(rows, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Prediction cache keyed on the encoded feature vector and model version.
+
+Form inputs are mostly discrete, so screening events score identical profiles
+again and again. :class:`PredictionCache` remembers the probability for each
+``(model version, encoded row)`` in a bounded in-process LRU with an optional
+TTL, optionally backed by a SQLite file so every worker process on the host
+shares results. The model version comes from ``ModelRegistry.version()``, so
+results of replaced artifacts are never served.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+PREDICTION_CACHE_DB = os.environ.get("CARDIOCARE_PREDICTION_CACHE_DB") or None
+PREDICTION_CACHE_SIZE = int(os.environ.get("CARDIOCARE_PREDICTION_CACHE_SIZE", 100_000))
+PREDICTION_CACHE_TTL = float(os.environ.get("CARDIOCARE_PREDICTION_CACHE_TTL", 0)) or None
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS predictions (
+    version TEXT NOT NULL,
+    features BLOB NOT NULL,
+    probability REAL NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (version, features)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_predictions_created ON predictions (created);
+"""
+
+# Writes to the shared store between trims back to max_entries / ttl
+TRIM_EVERY = 1000
+
+
+class PredictionCache:
+    """Bounded LRU/TTL cache of positive-class probabilities.
+
+    Keys are the float64 bytes of a row encoded by the feature schema, before
+    scaling. ``ttl`` (seconds, ``None`` for no expiry) applies to both tiers,
+    and the shared store is trimmed to ``max_entries`` every ``TRIM_EVERY``
+    writes. Entries of replaced artifacts are unreachable under the new version
+    and age out of both tiers.
+    """
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL, path=PREDICTION_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path:
+            with self._connect() as conn:
+                conn.executescript(SCHEMA_SQL)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # === LOOKUPS ===
+    def get_many(self, version, X):
+        """Cached probability for each row of ``X``, or ``None`` where missing."""
+        X = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float64)
+        keys = [(version, row.tobytes()) for row in X]
+        now = time.time()
+        results = [None] * len(keys)
+        missing = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and (self.ttl is None or now - entry[1] < self.ttl):
+                    self._entries.move_to_end(key)
+                    results[i] = entry[0]
+                else:
+                    missing.append(i)
+            self.hits += len(keys) - len(missing)
+
+        if missing and self.path:
+            found = {}
+            conn = self._connect()
+            for i in missing:
+                row = conn.execute("SELECT probability, created FROM predictions WHERE version = ? AND features = ?",
+                                   keys[i]).fetchone()
+                if row is not None and (self.ttl is None or now - row[1] < self.ttl):
+                    results[i] = row[0]
+                    found[keys[i]] = row
+            if found:
+                with self._lock:
+                    for key, entry in found.items():
+                        self._store(key, entry)
+                    self.disk_hits += len(found)
+                missing = [i for i in missing if results[i] is None]
+
+        with self._lock:
+            self.misses += len(missing)
+        return results
+
+    def get(self, version, row):
+        """Cached probability of a single encoded row, or ``None``."""
+        return self.get_many(version, row)[0]
+
+    def put_many(self, version, X, probabilities):
+        X = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float64)
+        now = time.time()
+        entries = [((version, row.tobytes()), (float(p), now)) for row, p in zip(X, probabilities)]
+        with self._lock:
+            for key, entry in entries:
+                self._store(key, entry)
+        if self.path:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                                 [(*key, *entry) for key, entry in entries])
+            with self._lock:
+                self._writes += len(entries)
+                due = self._writes >= TRIM_EVERY
+                if due:
+                    self._writes = 0
+            # Only the caller that reset the counter trims; outside the lock, so lookups don't wait on SQLite
+            if due:
+                self.trim()
+
+    def put(self, version, row, probability):
+        self.put_many(version, row, [probability])
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def trim(self):
+        """Delete expired rows and all but the newest ``max_entries`` from the shared store."""
+        with self._connect() as conn:
+            if self.ttl is not None:
+                conn.execute("DELETE FROM predictions WHERE created < ?", (time.time() - self.ttl,))
+            conn.execute("DELETE FROM predictions WHERE created < (SELECT created FROM predictions "
+                         "ORDER BY created DESC LIMIT 1 OFFSET ?)", (self.max_entries,))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM predictions")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None
+            }
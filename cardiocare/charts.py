@@ -0,0 +1,204 @@
+"""Plotly figures for the assessment results.
+
+Building a ``go.Figure`` validates every property, which costs far more than
+changing a few values on an existing one. :class:`FigureTemplate` keeps one
+prebuilt figure per chart type and updates only the value/bar arrays in place.
+
+Plotly is imported on first use, so importing this module (e.g. for a batch
+job that never draws) costs nothing.
+
+Usage::
+
+    python -m cardiocare.charts    # build + serialize time per assessment
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from cardiocare.tracing import traced
+
+RAINBOW_COLORS = [
+    '#FF0000', '#FF5500', '#FFAA00', '#FFFF00',
+    '#AAFF00', '#55FF00', '#00FF00', '#00FF55',
+    '#00FFAA', '#00FFFF', '#00AAFF', '#0055FF',
+    '#0000FF', '#5500FF', '#AA00FF', '#FF00FF'
+]
+
+
+# === GAUGE VISUALIZATION ===
+@traced("chart.gauge")
+def create_risk_gauge(probability, title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=probability * 100,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': title, 'font': {'size': 18}},
+        gauge={
+            'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
+            'bar': {'color': "#0a9396"},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': [
+                {'range': [0, 30], 'color': '#4CAF50'},
+                {'range': [30, 70], 'color': '#FFC107'},
+                {'range': [70, 100], 'color': '#F44336'}
+            ],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': probability * 100
+            }
+        }
+    ))
+
+    fig.update_layout(
+        height=300,
+        margin=dict(l=50, r=50, b=20, t=80),
+        font=dict(family="Arial", size=14, color="#005f73")
+    )
+    return fig
+
+
+@traced("chart.gauge.update")
+def update_risk_gauge(fig, probability, title):
+    gauge = fig.data[0]
+    gauge.value = probability * 100
+    gauge.title.text = title
+    gauge.gauge.threshold.value = probability * 100
+
+
+# === RAINBOW BAR CHART ===
+def rainbow_colors(n):
+    return [RAINBOW_COLORS[i % len(RAINBOW_COLORS)] for i in range(n)]
+
+
+@traced("chart.rainbow")
+def create_rainbow_bar_chart(labels, values, title):
+    import plotly.graph_objects as go
+
+    # One trace with a per-bar color array instead of one trace per factor
+    fig = go.Figure(go.Bar(
+        x=list(labels),
+        y=list(values),
+        marker_color=rainbow_colors(len(labels)),
+        width=0.7
+    ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Factors",
+        yaxis_title="Impact",
+        showlegend=False,
+        height=400,
+        template="plotly_white",
+        margin=dict(l=50, r=50, b=100, t=80),
+        font=dict(family="Arial", size=12, color="#005f73")
+    )
+
+    return fig
+
+
+@traced("chart.rainbow.update")
+def update_rainbow_bar_chart(fig, labels, values, title):
+    bar = fig.data[0]
+    bar.x = list(labels)
+    bar.y = list(values)
+    bar.marker.color = rainbow_colors(len(labels))
+    fig.layout.title.text = title
+
+
+# === HISTORY TREND ===
+@traced("chart.trend")
+def create_history_trend(trend_df):
+    """Risk probability (%) over time, one line per patient, from ``HistoryStore.trend``."""
+    import plotly.express as px
+
+    fig = px.line(
+        trend_df,
+        x="timestamp",
+        y="probability",
+        color="id",
+        markers=True,
+        title="Risk Probability Over Time"
+    )
+    fig.update_layout(
+        xaxis_title="Assessment Date",
+        yaxis_title="Risk Probability (%)",
+        legend_title="Patient ID"
+    )
+    return fig
+
+
+# === TEMPLATES ===
+class FigureTemplate:
+    """A prebuilt figure shared across reruns and sessions.
+
+    ``updated(*args)`` applies ``update(fig, *args)`` and yields the figure while
+    holding a lock, so render it (e.g. ``st.plotly_chart``) inside the block;
+    another session may change the values as soon as the block exits.
+    """
+
+    def __init__(self, fig, update):
+        self.fig = fig
+        self.update = update
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def updated(self, *args):
+        with self.lock:
+            self.update(self.fig, *args)
+            yield self.fig
+
+
+def risk_gauge_template():
+    return FigureTemplate(create_risk_gauge(0.0, ""), update_risk_gauge)
+
+
+def rainbow_bar_chart_template():
+    return FigureTemplate(create_rainbow_bar_chart([], [], ""), update_rainbow_bar_chart)
+
+
+# === BENCHMARK ===
+def benchmark(n=200):
+    """Mean ms to build and serialize the charts of one Heart Disease assessment."""
+    import plotly.io as pio
+
+    factors = ['Smoking', 'BMI', 'Activity', 'Alcohol', 'Diet', 'Stress']
+    values = [0.8, 0.3, 0.7, 0.0, 0.2, 0.1]
+
+    def fresh(i):
+        pio.to_json(create_risk_gauge(i / n, "Cardiovascular Risk Gauge"), validate=False)
+        pio.to_json(create_rainbow_bar_chart(factors, values, "Modifiable Risk Factors"), validate=False)
+        pio.to_json(create_rainbow_bar_chart(factors[:4], values[:4], "Non-Modifiable Risk Factors"), validate=False)
+
+    gauge, bars = risk_gauge_template(), rainbow_bar_chart_template()
+
+    def templated(i):
+        with gauge.updated(i / n, "Cardiovascular Risk Gauge") as fig:
+            pio.to_json(fig, validate=False)
+        with bars.updated(factors, values, "Modifiable Risk Factors") as fig:
+            pio.to_json(fig, validate=False)
+        with bars.updated(factors[:4], values[:4], "Non-Modifiable Risk Factors") as fig:
+            pio.to_json(fig, validate=False)
+
+    results = {}
+    for label, fn in [("fresh", fresh), ("template", templated)]:
+        start = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        results[label] = (time.perf_counter() - start) / n * 1000
+    return results
+
+
+def main():
+    for label, ms in benchmark().items():
+        print(f"{label:10s} {ms:6.2f} ms per assessment (build + serialize)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
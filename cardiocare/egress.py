@@ -0,0 +1,169 @@
+"""Bytes a Streamlit app sends over its websocket per rerun.
+
+Starts the app with ``streamlit run`` on a free local port and connects to
+``/_stcore/stream`` as a browser would. The client reports the hashes of the
+messages it already holds, as the frontend's message cache does, so unchanged
+elements that Streamlit can send by reference are counted at their reference
+size. For each page of the sidebar "Navigation" radio, the client switches to
+the page once and then reruns it unchanged ``--reruns`` times. It reports the
+bytes, messages and cache references of both.
+
+Usage::
+
+    python -m cardiocare.egress hp.py
+    python -m cardiocare.egress ht.py --reruns 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Runs after which the frontend drops a cached message it was not sent again
+# (Streamlit's global.maxCachedMessageAge)
+MAX_CACHED_MESSAGE_AGE = 2
+RERUNS = 3
+STARTUP_TIMEOUT = 120
+NAVIGATION_LABEL = "Navigation"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(script, port):
+    """``streamlit run script`` on ``port``, from the script's directory; returns the process once healthy."""
+    directory = os.path.dirname(os.path.abspath(script))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.basename(script), "--server.headless=true",
+         f"--server.port={port}", "--server.address=127.0.0.1", "--browser.gatherUsageStats=false",
+         "--server.fileWatcherType=none"],
+        cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"streamlit did not become healthy within {STARTUP_TIMEOUT} s")
+
+
+class StreamClient:
+    """One browser session: reruns the script and counts what comes back."""
+
+    def __init__(self, ws):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        self.ws = ws
+        self.BackMsg = BackMsg
+        self.ForwardMsg = ForwardMsg
+        self.widgets = {}
+        self.page_script_hash = ""
+        # hash -> runs since the message was last received
+        self.cache = {}
+        self.navigation = None
+
+    async def rerun(self):
+        """Rerun the script; returns ``{"bytes", "messages", "refs"}`` of its output."""
+        back = self.BackMsg()
+        state = back.rerun_script
+        state.page_script_hash = self.page_script_hash
+        state.widget_states.widgets.extend(self.widgets.values())
+        state.cached_message_hashes.extend(self.cache)
+        await self.ws.send(back.SerializeToString())
+
+        self.cache = {h: age + 1 for h, age in self.cache.items() if age + 1 <= MAX_CACHED_MESSAGE_AGE}
+        totals = {"bytes": 0, "messages": 0, "refs": 0}
+        while True:
+            data = await self.ws.recv()
+            msg = self.ForwardMsg()
+            msg.ParseFromString(data)
+            totals["bytes"] += len(data)
+            totals["messages"] += 1
+            kind = msg.WhichOneof("type")
+            if kind == "ref_hash":
+                totals["refs"] += 1
+                self.cache[msg.ref_hash] = 0
+            elif msg.metadata.cacheable:
+                self.cache[msg.hash] = 0
+            if kind == "new_session":
+                self.page_script_hash = msg.new_session.page_script_hash
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                if element.WhichOneof("type") == "radio" and element.radio.label == NAVIGATION_LABEL:
+                    self.navigation = element.radio
+            elif kind == "script_finished":
+                return totals
+
+    def select(self, page):
+        """Choose ``page`` in the navigation radio for the next rerun."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        self.widgets[self.navigation.id] = WidgetState(id=self.navigation.id, string_value=page)
+
+
+async def _measure(websockets, url, reruns):
+    results = []
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None, compression=None) as ws:
+        client = StreamClient(ws)
+        first = await client.rerun()
+        if client.navigation is None:
+            raise RuntimeError(f"No {NAVIGATION_LABEL!r} radio on the first page")
+        pages = list(client.navigation.options)
+        results.append({"page": pages[0], "switch": first, "reruns": [await client.rerun() for _ in range(reruns)]})
+        for page in pages[1:]:
+            client.select(page)
+            switch = await client.rerun()
+            results.append({"page": page, "switch": switch, "reruns": [await client.rerun() for _ in range(reruns)]})
+    return results
+
+
+def measure(script, reruns=RERUNS, port=None):
+    """``[{"page", "switch", "reruns"}]`` for every page of ``script``'s navigation radio.
+
+    ``switch`` is the rerun that opens the page (the first page load for the
+    first page), ``reruns`` the unchanged reruns after it.
+    """
+    try:
+        import websockets
+    except ImportError as e:
+        raise ImportError("Measuring websocket traffic needs websockets: pip install websockets") from e
+
+    port = port or _free_port()
+    process = start_app(script, port)
+    try:
+        return asyncio.run(_measure(websockets, f"ws://127.0.0.1:{port}/_stcore/stream", reruns))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure websocket bytes per rerun of a Streamlit app.")
+    parser.add_argument("script", help="Streamlit script, e.g. hp.py")
+    parser.add_argument("--reruns", type=int, default=RERUNS, help="Unchanged reruns per page")
+    parser.add_argument("--port", type=int, help="Port for the app (default: a free one)")
+    args = parser.parse_args(argv)
+
+    print(f"{'page':18s} {'switch bytes':>13s} {'msgs':>5s} {'refs':>5s} {'rerun bytes':>12s} {'msgs':>5s} {'refs':>5s}")
+    for result in measure(args.script, args.reruns, args.port):
+        switch, reruns = result["switch"], result["reruns"]
+        rerun = {key: statistics.median(run[key] for run in reruns) for key in ("bytes", "messages", "refs")}
+        print(f"{result['page']:18s} {switch['bytes']:13,d} {switch['messages']:5d} {switch['refs']:5d} "
+              f"{rerun['bytes']:12,.0f} {rerun['messages']:5.0f} {rerun['refs']:5.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Declarative feature schemas for the CardioCare models.
+
+A :class:`FeatureSchema` is the ordered column list a model was trained on,
+with each column's kind, valid range and categorical encoding. Forms, the batch
+scorer and the PDF report all encode and describe patients through it, and
+``schema_for`` resolves the schema from a fitted scaler's ``feature_names_in_``
+so an artifact trained on different columns fails at load, not mid-request.
+"""
+import numpy as np
+
+
+class SchemaError(ValueError):
+    """Input or artifact does not match the expected feature schema."""
+
+
+class Feature:
+    """One model input.
+
+    ``choices`` lists the labels of a categorical feature; a label is encoded
+    as its index. Numeric features are bounded by ``[low, high]``.
+    """
+
+    def __init__(self, name, label, kind="int", low=None, high=None, choices=None, unit=None, default=None):
+        self.name = name
+        self.label = label
+        self.kind = kind
+        self.choices = tuple(choices) if choices else None
+        self.low = 0 if self.choices else low
+        self.high = len(self.choices) - 1 if self.choices else high
+        self.unit = unit
+        self.default = default
+
+    def encode(self, value):
+        """Encode a form label or raw number, raising ``SchemaError`` if it is out of range."""
+        if isinstance(value, str):
+            if not self.choices or value not in self.choices:
+                raise SchemaError(f"{self.name}: unknown value {value!r}")
+            return float(self.choices.index(value))
+
+        value = float(value)
+        if not self.low <= value <= self.high:
+            raise SchemaError(f"{self.name}: {value} outside [{self.low}, {self.high}]")
+        if self.choices and not value.is_integer():
+            raise SchemaError(f"{self.name}: {value} is not a category code")
+        return value
+
+    def display(self, value):
+        """Human-readable value for reports, e.g. ``"120 mm Hg"`` or ``"Yes"``."""
+        if self.choices and not isinstance(value, str):
+            value = self.choices[int(value)]
+        return f"{value} {self.unit}" if self.unit else value
+
+
+class FeatureSchema:
+    """Ordered features a model was trained on."""
+
+    def __init__(self, name, features):
+        self.name = name
+        self.features = list(features)
+        self.columns = [f.name for f in self.features]
+        self._by_name = {f.name: f for f in self.features}
+        self._low = np.array([f.low for f in self.features], dtype=np.float64)
+        self._high = np.array([f.high for f in self.features], dtype=np.float64)
+        self._categorical = np.array([f.choices is not None for f in self.features])
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def encode_row(self, values):
+        """Encode one patient's ``{column: label or number}`` as a ``(1, n)`` float64 array.
+
+        Extra keys are ignored; missing or out-of-range columns raise ``SchemaError``.
+        """
+        missing = [name for name in self.columns if name not in values]
+        if missing:
+            raise SchemaError(f"{self.name}: missing features {missing}")
+        return np.array([[f.encode(values[f.name]) for f in self.features]], dtype=np.float64)
+
+    def encode_frame(self, df):
+        """Select, order and validate the schema columns of ``df`` as a float64 array."""
+        missing = [name for name in self.columns if name not in df.columns]
+        if missing:
+            raise SchemaError(f"{self.name}: missing columns {missing}")
+
+        X = np.ascontiguousarray(df[self.columns].to_numpy(dtype=np.float64))
+        bad = np.isnan(X) | (X < self._low) | (X > self._high)
+        bad[:, self._categorical] |= X[:, self._categorical] != np.round(X[:, self._categorical])
+        if bad.any():
+            counts = bad.sum(axis=0)
+            details = ", ".join(f"{name} ({n} rows)" for name, n in zip(self.columns, counts) if n)
+            raise SchemaError(f"{self.name}: invalid values in {details}")
+        return X
+
+    def describe(self, values, names):
+        """``{label: display value}`` for ``names``, used for the PDF report."""
+        return {self[name].label: self[name].display(values[name]) for name in names}
+
+    def check_columns(self, columns):
+        """Raise ``SchemaError`` unless ``columns`` is exactly this schema, in order."""
+        columns = list(columns)
+        if columns != self.columns:
+            raise SchemaError(f"{self.name}: artifact expects {columns}, schema has {self.columns}")
+
+
+# === SCHEMAS ===
+_YES_NO = ("No", "Yes")
+
+_COMMON = {
+    "age": Feature("age", "Age", low=18, high=100, default=45),
+    "sex": Feature("sex", "Sex", choices=("Female", "Male")),
+    "trestbps": Feature("trestbps", "Blood Pressure", low=80, high=200, unit="mm Hg", default=120),
+    "chol": Feature("chol", "Cholesterol", low=100, high=600, unit="mg/dl", default=200),
+    "fbs": Feature("fbs", "Fasting Blood Sugar", choices=_YES_NO),
+    "thalach": Feature("thalach", "Max Heart Rate", low=70, high=220, default=150),
+    "exang": Feature("exang", "Exercise Induced Angina", choices=_YES_NO),
+    "oldpeak": Feature("oldpeak", "ST Depression", kind="float", low=0.0, high=10.0, default=0.0),
+    "bmi": Feature("bmi", "BMI", kind="float", low=15.0, high=50.0, default=25.0),
+    "smoking": Feature("smoking", "Smoking", choices=_YES_NO),
+    "family_history": Feature("family_history", "Family History", choices=_YES_NO),
+    "diabetes": Feature("diabetes", "Diabetes", choices=_YES_NO)
+}
+
+EARLY_SCHEMA = FeatureSchema("early_warning", [
+    _COMMON["age"], _COMMON["sex"], _COMMON["trestbps"], _COMMON["chol"], _COMMON["fbs"],
+    _COMMON["thalach"], _COMMON["exang"], _COMMON["oldpeak"], _COMMON["bmi"], _COMMON["smoking"],
+    Feature("alcohol_intake", "Alcohol Intake", choices=("None", "Light", "Moderate", "Heavy")),
+    Feature("physical_activity", "Physical Activity", choices=("Sedentary", "Light", "Moderate", "Active")),
+    _COMMON["family_history"], _COMMON["diabetes"],
+    Feature("stress_level", "Stress Level", choices=("Low", "Moderate", "High")),
+    Feature("sleep_hours", "Sleep Hours", kind="float", low=3.0, high=12.0, default=7),
+    Feature("diet_score", "Diet Score", kind="float", low=1.0, high=10.0, default=6)
+])
+
+# Columns of heart_disease_2020_2025.csv, as used by the heart disease model in hdt.ipynb
+HEART_DISEASE_SCHEMA = FeatureSchema("heart_disease", [
+    _COMMON["age"], _COMMON["sex"],
+    Feature("cp", "Chest Pain Type",
+            choices=("Typical Angina", "Atypical Angina", "Non-anginal Pain", "Asymptomatic")),
+    _COMMON["trestbps"], _COMMON["chol"], _COMMON["fbs"],
+    Feature("restecg", "Resting ECG", choices=("Normal", "ST-T Abnormality", "LV Hypertrophy")),
+    _COMMON["thalach"], _COMMON["exang"], _COMMON["oldpeak"],
+    Feature("slope", "ST Slope", choices=("Upsloping", "Flat", "Downsloping")),
+    Feature("ca", "Major Vessels (0-3)", low=0, high=3, default=0),
+    Feature("thal", "Thalassemia", choices=("Normal", "Fixed Defect", "Reversible Defect")),
+    _COMMON["bmi"], _COMMON["smoking"],
+    Feature("alcohol_intake", "Alcohol Intake", choices=("None", "Moderate", "Heavy")),
+    Feature("physical_activity", "Physical Activity", choices=("Sedentary", "Moderate", "Active")),
+    _COMMON["family_history"], _COMMON["diabetes"]
+])
+
+SCHEMAS = [EARLY_SCHEMA, HEART_DISEASE_SCHEMA]
+
+
+def schema_for(scaler):
+    """Return the schema matching ``scaler.feature_names_in_`` or raise ``SchemaError``."""
+    columns = list(getattr(scaler, "feature_names_in_", []))
+    for schema in SCHEMAS:
+        if schema.columns == columns:
+            return schema
+    raise SchemaError(f"No feature schema matches artifact columns {columns}")
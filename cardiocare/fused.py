@@ -0,0 +1,188 @@
+"""Scaler + booster fused into one NumPy inference pipeline.
+
+The app used to score each form submit as ``pd.DataFrame`` -> ``scaler.transform``
+-> ``model.predict`` -> ``model.predict_proba``. :class:`FusedModel` keeps the
+scaler's ``mean_``/``scale_`` as contiguous arrays and feeds the scaled row
+straight into the XGBoost booster, so a prediction is one NumPy expression and
+one ``inplace_predict`` call.
+
+Usage::
+
+    python -m cardiocare.fused check    # parity against the DataFrame path
+    python -m cardiocare.fused bench    # p50/p99 single-row latency
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cardiocare.features import schema_for
+from cardiocare.models import MODEL_DIR, load_artifacts, model_threshold
+from cardiocare.tracing import traced
+
+DATA_DIR = os.path.dirname(MODEL_DIR)
+BUNDLED_CSVS = [
+    os.path.join(DATA_DIR, "early_heart_disease_detection_dataset.csv"),
+    os.path.join(DATA_DIR, "heart_disease_2020_2025.csv")
+]
+
+
+def risk_labels(prob, threshold):
+    """1 where ``prob >= threshold``, else 0: an ``int`` for a scalar, an int8 array otherwise.
+
+    ``>=`` is the rule the tuned thresholds were chosen with (see
+    ``cardiocare.train.evaluate``), so every path labels with this.
+    """
+    labels = np.asarray(prob) >= threshold
+    return int(labels) if labels.ndim == 0 else labels.astype(np.int8)
+
+
+class FusedModel:
+    """A fitted ``StandardScaler`` folded in front of an XGBoost booster.
+
+    Rows are scaled in float64 exactly as ``StandardScaler.transform`` does and
+    only then cast to float32 for the booster. Casting the raw row to float32
+    first would move values such as ``bmi=20.4`` across split thresholds that
+    sit exactly on training values, so the float32 step has to come last.
+    """
+
+    def __init__(self, booster, mean, scale, schema, threshold=0.5):
+        self.booster = booster
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.schema = schema
+        self.feature_names = schema.columns
+        self.threshold = threshold
+
+    @classmethod
+    def from_artifacts(cls, model, scaler, threshold=0.5):
+        """Build from the estimator and scaler pair returned by ``load_artifacts``.
+
+        Raises ``SchemaError`` if the scaler was fitted on columns no schema describes.
+        """
+        return cls(model.get_booster(), scaler.mean_, scaler.scale_, schema_for(scaler), threshold)
+
+    def row(self, values):
+        """Validate and encode a feature dict as a ``(1, n_features)`` float64 array."""
+        return self.schema.encode_row(values)
+
+    @traced("model.transform")
+    def transform(self, X):
+        """Scale raw features and return the contiguous float32 array the booster consumes."""
+        X = np.asarray(X, dtype=np.float64)
+        return np.ascontiguousarray((X - self.mean) / self.scale, dtype=np.float32)
+
+    @traced("model.predict")
+    def predict_scaled(self, scaled):
+        """Positive-class probability for rows already passed through ``transform``."""
+        return self.booster.inplace_predict(scaled)
+
+    def predict_proba(self, X):
+        """Positive-class probability for every row of ``X``."""
+        return self.predict_scaled(self.transform(X))
+
+    def label(self, prob):
+        """Risk labels of positive-class probabilities at the model's threshold (see ``risk_labels``)."""
+        return risk_labels(prob, self.threshold)
+
+    def predict(self, X):
+        """Risk labels of every row of ``X``."""
+        return self.label(self.predict_proba(X))
+
+
+def fuse_artifacts(early_model, hd_model, scaler, scaler_hd, base_dir=MODEL_DIR):
+    """Return ``(early_fused, hd_fused)`` for the artifacts loaded by ``load_artifacts`` from ``base_dir``.
+
+    Both use their tuned thresholds (see ``cardiocare.models.model_threshold``).
+    """
+    return (FusedModel.from_artifacts(early_model, scaler, model_threshold("early_model", base_dir)),
+            FusedModel.from_artifacts(hd_model, scaler_hd, model_threshold("hd_model", base_dir)))
+
+
+def check_parity(csv_paths=BUNDLED_CSVS, base_dir=MODEL_DIR):
+    """Compare the fused path to ``scaler.transform`` + ``predict_proba`` on each CSV.
+
+    Returns a list of ``(model_name, csv_name, max_abs_diff, labels_equal)``. A
+    CSV that lacks some of a model's feature columns is reported with ``None``.
+    """
+    early_model, hd_model, scaler, scaler_hd = load_artifacts(base_dir)
+    pairs = {
+        "early_model": (early_model, scaler),
+        "hd_model": (hd_model, scaler_hd)
+    }
+
+    results = []
+    for csv_path in csv_paths:
+        df = pd.read_csv(csv_path)
+        for name, (model, model_scaler) in pairs.items():
+            fused = FusedModel.from_artifacts(model, model_scaler)
+            if not set(fused.feature_names).issubset(df.columns):
+                results.append((name, os.path.basename(csv_path), None, None))
+                continue
+
+            features = df[fused.feature_names]
+            scaled = model_scaler.transform(features)
+            expected_prob = model.predict_proba(scaled)[:, 1]
+            expected_pred = model.predict(scaled)
+
+            prob = fused.predict_proba(features.to_numpy())
+            pred = fused.predict(features.to_numpy())
+            results.append((name, os.path.basename(csv_path), float(np.abs(prob - expected_prob).max()),
+                            bool((pred == expected_pred).all())))
+    return results
+
+
+def benchmark(csv_path=BUNDLED_CSVS[0], n=2000, base_dir=MODEL_DIR):
+    """Single-row p50/p99 latency in microseconds for the DataFrame and fused paths."""
+    early_model, _, scaler, _ = load_artifacts(base_dir)
+    fused = FusedModel.from_artifacts(early_model, scaler)
+    rows = pd.read_csv(csv_path, nrows=n)[fused.feature_names].to_dict("records")
+
+    def dataframe_path(input_dict):
+        scaled_input = scaler.transform(pd.DataFrame([input_dict]))
+        early_model.predict(scaled_input)[0]
+        early_model.predict_proba(scaled_input)[0][1]
+
+    def fused_path(input_dict):
+        prob = fused.predict_proba(fused.row(input_dict))[0]
+        fused.label(prob)
+
+    results = {}
+    for label, fn in [("dataframe", dataframe_path), ("fused", fused_path)]:
+        timings = []
+        for input_dict in rows:
+            start = time.perf_counter()
+            fn(input_dict)
+            timings.append(time.perf_counter() - start)
+        p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+        results[label] = {"p50_us": p50, "p99_us": p99}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or benchmark the fused scaler+model pipeline.")
+    parser.add_argument("command", choices=["check", "bench"])
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("-n", type=int, default=2000, help="Rows to time in bench mode")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        ok = True
+        for name, csv_name, diff, labels_equal in check_parity(base_dir=args.model_dir):
+            if diff is None:
+                print(f"{name:12s} {csv_name}: skipped (missing feature columns)")
+                continue
+            ok = ok and diff == 0.0 and labels_equal
+            print(f"{name:12s} {csv_name}: max |dp| = {diff:.3g}, labels equal = {labels_equal}")
+        return 0 if ok else 1
+
+    for label, stats in benchmark(n=args.n, base_dir=args.model_dir).items():
+        print(f"{label:10s} p50 = {stats['p50_us']:8.1f} us   p99 = {stats['p99_us']:8.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
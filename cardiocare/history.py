@@ -0,0 +1,356 @@
+"""Persistent patient history in an embedded SQLite database.
+
+The database runs in WAL mode, so every Streamlit session and worker process on
+the host can read while one of them writes. Probabilities are stored as
+numbers in ``[0, 1]``. A unique constraint over the record's fields replaces
+the old ``patient_data not in history`` list scan.
+
+Reads are filtered, paginated and aggregated in SQL so the Patient History
+page stays flat as the table grows. A ``daily_summary`` rollup is kept by
+triggers so that unfiltered and date/mode/risk-filtered metrics never scan
+``assessments``.
+
+Usage::
+
+    python -m cardiocare.history history.csv.gz --format csv.gz    # streamed export
+"""
+import argparse
+import csv
+import gzip
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+HISTORY_DB = os.environ.get(
+    "CARDIOCARE_HISTORY_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "patient_history.db")
+)
+
+COLUMNS = ["id", "name", "age", "sex", "risk_level", "probability", "timestamp", "mode"]
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS assessments (
+    row_id INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    sex TEXT NOT NULL,
+    risk_level TEXT NOT NULL,
+    probability REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    UNIQUE (id, timestamp, mode, name, age, sex, risk_level, probability)
+);
+CREATE INDEX IF NOT EXISTS idx_assessments_patient ON assessments (id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_assessments_timestamp ON assessments (timestamp);
+
+CREATE TABLE IF NOT EXISTS daily_summary (
+    day TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    risk_level TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    probability_sum REAL NOT NULL,
+    PRIMARY KEY (day, mode, risk_level)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_assessments_insert AFTER INSERT ON assessments BEGIN
+    INSERT INTO daily_summary VALUES (substr(NEW.timestamp, 1, 10), NEW.mode, NEW.risk_level, 1, NEW.probability)
+    ON CONFLICT (day, mode, risk_level) DO UPDATE
+    SET n = n + 1, probability_sum = probability_sum + excluded.probability_sum;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assessments_delete AFTER DELETE ON assessments BEGIN
+    UPDATE daily_summary SET n = n - 1, probability_sum = probability_sum - OLD.probability
+    WHERE day = substr(OLD.timestamp, 1, 10) AND mode = OLD.mode AND risk_level = OLD.risk_level;
+END;
+"""
+
+# Newest rows scanned when picking which patients to draw on the trend chart
+TREND_SCAN_ROWS = 5000
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "parquet": ("parquet", "application/vnd.apache.parquet")
+}
+
+
+class HistoryStore:
+    """Assessment records keyed by patient id and timestamp.
+
+    One connection is opened per thread, since Streamlit runs each session's
+    script on its own thread. Read methods take the same filters: ``patient_id``,
+    ``start``/``end`` dates (inclusive), ``mode`` and ``risk_level``; ``None``
+    means no filter.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA_SQL)
+            # Databases created before the rollup existed start with an empty summary
+            if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM daily_summary) "
+                            "AND EXISTS (SELECT 1 FROM assessments)").fetchone()[0]:
+                conn.execute("INSERT INTO daily_summary SELECT substr(timestamp, 1, 10), mode, risk_level, "
+                             "COUNT(*), SUM(probability) FROM assessments GROUP BY 1, 2, 3")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # === WRITES ===
+    def add(self, record):
+        """Insert one assessment dict with the keys in ``COLUMNS``.
+
+        Returns ``False`` if an identical record is already stored.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO assessments ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                [record[column] for column in COLUMNS]
+            )
+        return cursor.rowcount == 1
+
+    def add_many(self, records):
+        """Insert an iterable of assessment dicts in one transaction; returns rows inserted."""
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO assessments ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                ([record[column] for column in COLUMNS] for record in records)
+            )
+        return cursor.rowcount
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM assessments")
+            conn.execute("DELETE FROM daily_summary")
+
+    # === READS ===
+    @staticmethod
+    def _where(patient_id=None, start=None, end=None, mode=None, risk_level=None, day_column=None):
+        """SQL ``WHERE`` clause and parameters for the shared filters.
+
+        With ``day_column`` the date filter compares whole days against that
+        column (used for ``daily_summary``) instead of ``timestamp``.
+        """
+        clauses, params = [], []
+        if patient_id:
+            clauses.append("id = ?")
+            params.append(patient_id)
+        if start is not None:
+            clauses.append(f"{day_column or 'timestamp'} >= ?")
+            params.append(str(start))
+        if end is not None:
+            if day_column:
+                clauses.append(f"{day_column} <= ?")
+                params.append(str(end))
+            else:
+                clauses.append("timestamp < ?")
+                params.append(str(_parse_date(end) + timedelta(days=1)))
+        if mode:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if risk_level:
+            clauses.append("risk_level = ?")
+            params.append(risk_level)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        return self.summary(**filters)["total"]
+
+    def summary(self, **filters):
+        """``total``, ``high_risk`` and ``avg_probability`` (``None`` when empty) for the filters."""
+        if filters.get("patient_id"):
+            where, params = self._where(**filters)
+            sql = (f"SELECT COUNT(*), SUM(risk_level = 'High'), SUM(probability) "
+                   f"FROM assessments{where}")
+        else:
+            where, params = self._where(day_column="day", **filters)
+            sql = (f"SELECT SUM(n), SUM(CASE WHEN risk_level = 'High' THEN n ELSE 0 END), SUM(probability_sum) "
+                   f"FROM daily_summary{where}")
+
+        total, high_risk, probability_sum = self._connect().execute(sql, params).fetchone()
+        total = total or 0
+        return {
+            "total": total,
+            "high_risk": high_risk or 0,
+            "avg_probability": probability_sum / total if total else None
+        }
+
+    def page(self, page=1, page_size=50, **filters):
+        """One page (1-based) of records, newest first."""
+        where, params = self._where(**filters)
+        return pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM assessments{where} "
+            f"ORDER BY timestamp DESC, row_id DESC LIMIT ? OFFSET ?",
+            self._connect(),
+            params=params + [page_size, (max(page, 1) - 1) * page_size]
+        )
+
+    def frame(self, **filters):
+        """All matching records, newest first, with ``probability`` as a float in ``[0, 1]``."""
+        where, params = self._where(**filters)
+        return pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM assessments{where} ORDER BY timestamp DESC, row_id DESC",
+            self._connect(),
+            params=params
+        )
+
+    def trend(self, max_points=100, max_patients=10, **filters):
+        """Probability over time for the most recently assessed patients.
+
+        Each patient's history is split into at most ``max_points`` buckets of
+        consecutive assessments and each bucket is reduced to its mean
+        probability and last timestamp, so the chart size is bounded no matter
+        how many rows match.
+        """
+        conn = self._connect()
+        where, params = self._where(**filters)
+        if filters.get("patient_id"):
+            patient_ids = [filters["patient_id"]]
+        else:
+            patient_ids = [row[0] for row in conn.execute(
+                f"SELECT id FROM (SELECT id, timestamp FROM assessments{where} "
+                f"ORDER BY timestamp DESC LIMIT ?) GROUP BY id ORDER BY MAX(timestamp) DESC LIMIT ?",
+                params + [TREND_SCAN_ROWS, max_patients]
+            )]
+        if not patient_ids:
+            return pd.DataFrame(columns=["id", "timestamp", "probability"])
+
+        id_clause = f"id IN ({', '.join('?' * len(patient_ids))})"
+        where = f"{where} AND {id_clause}" if where else f" WHERE {id_clause}"
+        return pd.read_sql_query(
+            f"""
+            SELECT id, MAX(timestamp) AS timestamp, AVG(probability) AS probability
+            FROM (
+                SELECT id, timestamp, probability,
+                       (ROW_NUMBER() OVER w - 1) * ? / COUNT(*) OVER (PARTITION BY id) AS bucket
+                FROM assessments{where}
+                WINDOW w AS (PARTITION BY id ORDER BY timestamp, row_id)
+            )
+            GROUP BY id, bucket
+            ORDER BY id, timestamp
+            """,
+            conn,
+            params=[max_points] + params + patient_ids
+        )
+
+    def export(self, dest, fmt="csv", chunk_size=50_000, **filters):
+        """Stream matching records to ``dest`` (a path or binary file object).
+
+        Rows are fetched and written ``chunk_size`` at a time, so memory stays
+        bounded by one chunk regardless of history size. ``fmt`` is one of
+        ``EXPORT_FORMATS``; Parquet needs ``pyarrow``. ``probability`` is
+        written as a percentage, as shown in the app. Returns rows written.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+
+        where, params = self._where(**filters)
+        select = ", ".join("probability * 100 AS probability" if c == "probability" else c for c in COLUMNS)
+        cursor = self._connect().execute(
+            f"SELECT {select} FROM assessments{where} ORDER BY timestamp DESC, row_id DESC", params
+        )
+
+        owns_file = isinstance(dest, (str, os.PathLike))
+        raw = open(dest, "wb") if owns_file else dest
+        try:
+            if fmt == "parquet":
+                return _write_parquet(cursor, raw, chunk_size)
+            return _write_csv(cursor, raw, chunk_size, compress=fmt == "csv.gz")
+        finally:
+            if owns_file:
+                raw.close()
+
+
+def _write_csv(cursor, raw, chunk_size, compress=False):
+    binary = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) if compress else raw
+    text = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(COLUMNS)
+
+    rows = 0
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        writer.writerows(chunk)
+        rows += len(chunk)
+
+    # Flush through the gzip layer without closing the caller's file object
+    text.flush()
+    text.detach()
+    if compress:
+        binary.close()
+    return rows
+
+
+def _write_parquet(cursor, raw, chunk_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from e
+
+    schema = pa.schema([
+        ("id", pa.string()), ("name", pa.string()), ("age", pa.int64()), ("sex", pa.string()),
+        ("risk_level", pa.string()), ("probability", pa.float64()), ("timestamp", pa.string()),
+        ("mode", pa.string())
+    ])
+    rows = 0
+    with pq.ParquetWriter(raw, schema) as writer:
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)],
+                schema=schema
+            ))
+            rows += len(chunk)
+    return rows
+
+
+def _parse_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export CardioCare patient history.")
+    parser.add_argument("output", help="File to write")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--db", default=HISTORY_DB)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = HistoryStore(args.db).export(args.output, args.format, chunk_size=args.chunk_size)
+    seconds = time.perf_counter() - start
+    try:
+        # Unix only; ru_maxrss is KiB on Linux
+        import resource
+    except ImportError:
+        print(f"Exported {rows} rows in {seconds:.2f}s", file=sys.stderr)
+    else:
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"Exported {rows} rows in {seconds:.2f}s, peak RSS {peak_mb:.0f} MB", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Memory per worker of the inference service, by worker count and topology.
+
+Starts ``python -m cardiocare.service serve`` with 1, 4 and 16 workers, once
+with uvicorn's own workers (each process loads its own models) and once with
+``--preload`` (the models are loaded in a parent that forks the workers). It
+waits for every worker to start, sends each a share of prediction requests,
+and reads every process's memory from ``/proc/<pid>/smaps_rollup`` (Linux):
+
+- RSS counts every resident page the process maps, shared or not, so it
+  overstates what each preforked worker costs.
+- PSS splits each shared page evenly between the processes that map it; the
+  PSS of all processes adds up to what the service occupies on the host.
+- USS counts only the process's private pages: what stopping it would free.
+
+Usage::
+
+    python -m cardiocare.memory
+    python -m cardiocare.memory --workers 1 4 --topology preload
+"""
+import argparse
+import asyncio
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from cardiocare.fused import DATA_DIR
+
+WORKERS = (1, 4, 16)
+TOPOLOGIES = ("spawn", "preload")
+# Prediction requests per worker before measuring, so each has scored
+REQUESTS_PER_WORKER = 50
+STARTUP_TIMEOUT = 600
+STARTED = "Application startup complete"
+
+
+def process_memory(pid):
+    """``{"rss", "pss", "uss"}`` of process ``pid`` in bytes."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            match = re.match(r"(\w+):\s+(\d+) kB", line)
+            if match:
+                fields[match.group(1)] = int(match.group(2)) * 1024
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "uss": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name in parentheses may contain spaces
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                children.append(int(entry))
+    return children
+
+
+def _cmdline(pid):
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode(errors="replace")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_started(process, log_path, workers, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with status {process.returncode}; see {log_path}")
+        with open(log_path, errors="replace") as f:
+            if f.read().count(STARTED) >= workers:
+                return
+        time.sleep(0.5)
+    raise RuntimeError(f"{workers} workers did not start within {timeout} s; see {log_path}")
+
+
+def measure(workers, topology="spawn", requests_per_worker=REQUESTS_PER_WORKER):
+    """Memory of a service with ``workers`` workers started as ``topology``.
+
+    Returns ``{"workers": [process_memory, ...], "parent": process_memory or
+    None}``. ``parent`` is the process that started the workers; uvicorn runs a
+    single worker in that process itself, so it is ``None`` then.
+    """
+    from cardiocare.service import load_test
+
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology {topology!r}; expected one of {', '.join(TOPOLOGIES)}")
+    port = _free_port()
+    command = [sys.executable, "-m", "cardiocare.service", "serve", "--port", str(port), "--workers", str(workers)]
+    if topology == "preload":
+        command.append("--preload")
+
+    with tempfile.NamedTemporaryFile(prefix="cardiocare-memory-", suffix=".log", delete=False) as log:
+        process = subprocess.Popen(command, cwd=DATA_DIR, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        _wait_started(process, log.name, workers)
+        asyncio.run(load_test(f"http://127.0.0.1:{port}", requests=requests_per_worker * workers,
+                              concurrency=2 * workers))
+        # uvicorn's spawned workers share the parent with multiprocessing's resource tracker
+        pids = [pid for pid in _children(process.pid) if "resource_tracker" not in _cmdline(pid)]
+        if pids:
+            return {"workers": [process_memory(pid) for pid in pids], "parent": process_memory(process.pid)}
+        return {"workers": [process_memory(process.pid)], "parent": None}
+    finally:
+        process.terminate()
+        process.wait()
+        os.unlink(log.name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report memory per worker of the CardioCare API.")
+    parser.add_argument("--workers", type=int, nargs="+", default=list(WORKERS), help="Worker counts to start")
+    parser.add_argument("--topology", choices=TOPOLOGIES, nargs="+", default=list(TOPOLOGIES),
+                        help="spawn: uvicorn workers that each load the models; preload: forked after loading")
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_WORKER, help="Requests per worker before measuring")
+    args = parser.parse_args(argv)
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        parser.error("reading process memory needs Linux's /proc/<pid>/smaps_rollup")
+
+    mb = 1024 * 1024
+    print(f"{'topology':9s} {'workers':>7s} {'RSS/worker':>11s} {'PSS/worker':>11s} {'USS/worker':>11s} "
+          f"{'parent PSS':>11s} {'total PSS':>10s}  (MB, medians per worker)")
+    for topology in args.topology:
+        for workers in args.workers:
+            result = measure(workers, topology, args.requests)
+            per_worker = {key: statistics.median(memory[key] for memory in result["workers"]) / mb
+                          for key in ("rss", "pss", "uss")}
+            parent_pss = result["parent"]["pss"] / mb if result["parent"] else 0.0
+            total_pss = parent_pss + sum(memory["pss"] for memory in result["workers"]) / mb
+            print(f"{topology:9s} {workers:7d} {per_worker['rss']:11.1f} {per_worker['pss']:11.1f} "
+                  f"{per_worker['uss']:11.1f} {parent_pss:11.1f} {total_pss:10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
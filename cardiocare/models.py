@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import joblib
+
+from cardiocare.tracing import span
+
+# === ARTIFACTS ===
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exported_models")
+
+MODEL_FILES = {
+    "early_model": "xgb_early_hd_model.joblib",
+    "hd_model": "heart_disease_model_final.pkl",
+    "scaler": "scaler_hd.joblib",
+    "scaler_hd": "scaler_final.pkl",
+    # Boosters with their scaler and threshold, written by ``python -m cardiocare.native export``
+    "early_native": "xgb_early_hd_model.ubj",
+    "hd_native": "heart_disease_model_final.ubj"
+}
+
+# Loaded with XGBoost's own reader instead of joblib
+NATIVE_EXTENSIONS = (".ubj", ".json")
+
+# Decision thresholds tuned in hdt.ipynb (precision-recall F1 optimum) for the bundled
+# models; a model promoted by ``python -m cardiocare.train`` brings its own (see model_threshold)
+EARLY_THRESHOLD = 0.57
+HD_THRESHOLD = 0.5006
+DEFAULT_THRESHOLDS = {
+    "early_model": EARLY_THRESHOLD,
+    "hd_model": HD_THRESHOLD
+}
+
+
+def metrics_path(name, base_dir=MODEL_DIR):
+    """Metrics of the promoted run of model artifact ``name``, e.g. ``xgb_early_hd_model.metrics.json``."""
+    return os.path.join(base_dir, os.path.splitext(MODEL_FILES[name])[0] + ".metrics.json")
+
+
+def model_threshold(name, base_dir=MODEL_DIR):
+    """Decision threshold of model artifact ``name`` (``"early_model"`` or ``"hd_model"``).
+
+    The threshold tuned by the promoted training run, read from
+    ``metrics_path``; ``DEFAULT_THRESHOLDS`` for models that were never
+    retrained. Every backend labels with this, so labels do not depend on the
+    backend after a promotion.
+    """
+    try:
+        with open(metrics_path(name, base_dir)) as f:
+            return float(json.load(f)["test"]["threshold"])
+    except FileNotFoundError:
+        return DEFAULT_THRESHOLDS[name]
+
+
+# === MODEL REGISTRY ===
+class ModelRegistry:
+    """Loads each artifact in ``MODEL_FILES`` on first use.
+
+    ``warm()`` starts loading in a background thread pool so a fresh process can
+    render its first page while the models are still being unpickled. Per-artifact
+    load time and size are available from ``stats()``.
+
+    An artifact whose file changes on disk (size or mtime) is reloaded by the
+    next ``get``, and ``version()`` identifies the loaded artifacts by content
+    so caches of their outputs can be keyed on it.
+    """
+
+    def __init__(self, base_dir=MODEL_DIR, files=MODEL_FILES):
+        self.base_dir = base_dir
+        self.files = dict(files)
+        for name, fname in self.files.items():
+            if not os.path.exists(os.path.join(base_dir, fname)):
+                raise FileNotFoundError(f"Missing: {fname}")
+
+        self._objects = {}
+        self._load_seconds = {}
+        self._file_stats = {}
+        self._digests = {}
+        self._locks = {name: threading.Lock() for name in self.files}
+
+    def _file_stat(self, name):
+        st = os.stat(os.path.join(self.base_dir, self.files[name]))
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, name):
+        """Return the loaded artifact ``name``, (re)loading it if needed."""
+        if name in self._objects and self._file_stats[name] == self._file_stat(name):
+            return self._objects[name]
+
+        with self._locks[name]:
+            if name not in self._objects or self._file_stats[name] != self._file_stat(name):
+                path = os.path.join(self.base_dir, self.files[name])
+                start = time.perf_counter()
+                file_stat = self._file_stat(name)
+                with span("model.load"):
+                    if path.endswith(NATIVE_EXTENSIONS):
+                        from cardiocare.native import load_native
+                        obj = load_native(path)
+                    else:
+                        obj = joblib.load(path)
+                self._load_seconds[name] = time.perf_counter() - start
+                self._file_stats[name] = file_stat
+                self._objects[name] = obj
+        return self._objects[name]
+
+    def _digest(self, name):
+        file_stat = self._file_stat(name)
+        cached = self._digests.get(name)
+        if cached is None or cached[0] != file_stat:
+            with open(os.path.join(self.base_dir, self.files[name]), "rb") as f:
+                cached = self._digests[name] = (file_stat, hashlib.sha256(f.read()).hexdigest())
+        return cached[1]
+
+    def version(self, *names):
+        """Short content hash of the artifact files ``names``.
+
+        Hashes the files without loading them; ``get`` reloads an artifact whose
+        file changed, so the version describes what the next ``get`` returns.
+        """
+        return hashlib.sha256("".join(self._digest(name) for name in names).encode()).hexdigest()[:16]
+
+    def is_loaded(self, name):
+        return name in self._objects
+
+    def warm(self, names=None, max_workers=None, budget=None):
+        """Load ``names`` (default: all artifacts) in a background thread pool.
+
+        With ``budget`` (seconds), block for at most that long; artifacts that are
+        not ready by then keep loading in the background and ``get`` waits for
+        them on first use. Returns the list of futures.
+        """
+        names = list(self.files) if names is None else list(names)
+        pending = [name for name in names if not self.is_loaded(name)]
+        if not pending:
+            return []
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(pending),
+                                      thread_name_prefix="cardiocare-warm")
+        futures = [executor.submit(self.get, name) for name in pending]
+        executor.shutdown(wait=False)
+
+        if budget is not None:
+            wait(futures, timeout=budget)
+        return futures
+
+    def stats(self):
+        """Per-artifact ``loaded``, ``load_seconds``, ``file_bytes`` and ``memory_bytes``.
+
+        ``memory_bytes`` is the size of the artifact's pickled payload, a close
+        proxy for the arrays and booster buffers it holds in memory.
+        """
+        stats = {}
+        for name, fname in self.files.items():
+            obj = self._objects.get(name)
+            stats[name] = {
+                "file": fname,
+                "loaded": obj is not None,
+                "load_seconds": self._load_seconds.get(name),
+                "file_bytes": os.path.getsize(os.path.join(self.base_dir, fname)),
+                "memory_bytes": len(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)) if obj is not None else None
+            }
+        return stats
+
+
+def load_artifacts(base_dir=MODEL_DIR):
+    """Load the early model, heart disease model and their scalers from ``base_dir``."""
+    names = ("early_model", "hd_model", "scaler", "scaler_hd")
+    registry = ModelRegistry(base_dir, {name: MODEL_FILES[name] for name in names})
+    return tuple(registry.get(name) for name in names)
@@ -0,0 +1,164 @@
+"""Native XGBoost booster artifacts.
+
+``exported_models/*.joblib``/``*.pkl`` pickle a whole ``XGBClassifier`` (and a
+``StandardScaler``), so loading them unpickles the sklearn wrapper and goes
+through XGBoost's legacy-pickle path. ``export_native`` saves just the booster
+in XGBoost's own UBJ (or JSON) format, with the tuned threshold, the feature
+names and the scaler's ``mean_``/``scale_`` stored as booster attributes.
+``load_native`` reads that single file back into a :class:`FusedModel` that
+scores with ``inplace_predict``, without joblib or sklearn.
+
+Usage::
+
+    python -m cardiocare.native export           # writes the .ubj boosters next to the joblib artifacts
+    python -m cardiocare.native bench            # load time, memory and latency vs joblib
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from cardiocare.features import schema_for
+from cardiocare.fused import BUNDLED_CSVS, FusedModel
+from cardiocare.models import MODEL_DIR, MODEL_FILES, load_artifacts, model_threshold
+
+# Native artifact -> (joblib model, joblib scaler); the threshold comes from model_threshold
+NATIVE_SOURCES = {
+    "early_native": ("early_model", "scaler"),
+    "hd_native": ("hd_model", "scaler_hd")
+}
+
+
+class _ScalerParams:
+    """The attributes of a fitted ``StandardScaler`` that ``schema_for`` and ``FusedModel`` read."""
+
+    def __init__(self, feature_names, mean, scale):
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+
+def export_native(model, scaler, path, threshold):
+    """Save ``model``'s booster with ``scaler`` and ``threshold`` as metadata.
+
+    The format follows the extension: ``.ubj`` (binary) or ``.json``.
+    """
+    schema = schema_for(scaler)
+    booster = model.get_booster().copy()
+    booster.feature_names = schema.columns
+    booster.set_attr(
+        cardiocare_schema=schema.name,
+        cardiocare_threshold=repr(float(threshold)),
+        cardiocare_scaler_mean=json.dumps(scaler.mean_.tolist()),
+        cardiocare_scaler_scale=json.dumps(scaler.scale_.tolist())
+    )
+    booster.save_model(path)
+
+
+def load_native(path):
+    """Load a booster written by ``export_native`` as a :class:`FusedModel`.
+
+    Raises ``SchemaError`` if its feature names match no feature schema.
+    """
+    booster = xgb.Booster(model_file=path)
+    attrs = booster.attributes()
+    scaler = _ScalerParams(booster.feature_names, json.loads(attrs["cardiocare_scaler_mean"]),
+                           json.loads(attrs["cardiocare_scaler_scale"]))
+    return FusedModel(booster, scaler.mean_, scaler.scale_, schema_for(scaler),
+                      float(attrs["cardiocare_threshold"]))
+
+
+def export_all(base_dir=MODEL_DIR):
+    """Export every ``NATIVE_SOURCES`` entry to its ``MODEL_FILES`` path; returns the paths."""
+    early_model, hd_model, scaler, scaler_hd = load_artifacts(base_dir)
+    artifacts = {"early_model": early_model, "hd_model": hd_model, "scaler": scaler, "scaler_hd": scaler_hd}
+    paths = []
+    for name, (model_name, scaler_name) in NATIVE_SOURCES.items():
+        path = os.path.join(base_dir, MODEL_FILES[name])
+        export_native(artifacts[model_name], artifacts[scaler_name], path, model_threshold(model_name, base_dir))
+        paths.append(path)
+    return paths
+
+
+# === BENCHMARK ===
+# Path -> (imports, load statement); timed separately in a fresh interpreter
+_LOAD_SNIPPETS = {
+    "joblib": ("from cardiocare.models import load_artifacts; from cardiocare.fused import FusedModel",
+               "m, _, s, _ = load_artifacts({base_dir!r}); FusedModel.from_artifacts(m, s)"),
+    "native": ("from cardiocare.native import load_native",
+               "load_native({path!r})")
+}
+
+
+def _measure_load(imports, load):
+    """Load seconds and resident MB added by ``load`` after ``imports``, in a fresh interpreter."""
+    code = ("import os, time, warnings; warnings.simplefilter('ignore')\n"
+            f"{imports}\n"
+            "rss = lambda: int(open('/proc/self/statm').read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20\n"
+            "before = rss(); start = time.perf_counter()\n"
+            f"{load}\n"
+            "print(time.perf_counter() - start, rss() - before)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    seconds, rss = out.stdout.split()[-2:]
+    return float(seconds), float(rss)
+
+
+def benchmark(base_dir=MODEL_DIR, n=1000, batch_rows=(1, 100, 10_000)):
+    """Load time, added RSS and p50 latency of the joblib and native paths for the early model."""
+    path = os.path.join(base_dir, MODEL_FILES["early_native"])
+    results = {}
+    for label, (imports, load) in _LOAD_SNIPPETS.items():
+        seconds, rss = _measure_load(imports, load.format(base_dir=base_dir, path=path))
+        results[label] = {"load_s": seconds, "rss_mb": rss}
+
+    early_model, _, scaler, _ = load_artifacts(base_dir)
+    native = load_native(path)
+    data = native.schema.encode_frame(pd.read_csv(BUNDLED_CSVS[0]))
+
+    def sklearn_path(X):
+        return early_model.predict_proba(scaler.transform(pd.DataFrame(X, columns=native.feature_names)))[:, 1]
+
+    for label, predict in [("joblib", sklearn_path), ("native", native.predict_proba)]:
+        for rows in batch_rows:
+            X = np.resize(data, (rows, data.shape[1]))
+            repeats = max(1, n // rows)
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                predict(X)
+                timings.append(time.perf_counter() - start)
+            results[label][f"p50_ms_{rows}"] = float(np.median(timings) * 1000)
+
+    diff = np.abs(sklearn_path(data) - native.predict_proba(data)).max()
+    return results, float(diff)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or benchmark native XGBoost booster artifacts.")
+    parser.add_argument("command", choices=["export", "bench"])
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for path in export_all(args.model_dir):
+            print(f"Wrote {path} ({os.path.getsize(path):,} bytes)")
+        return 0
+
+    results, diff = benchmark(args.model_dir)
+    for label, stats in results.items():
+        latencies = "   ".join(f"{key[7:]} rows {value:.3f} ms" for key, value in stats.items() if key.startswith("p50"))
+        print(f"{label:7s} load {stats['load_s'] * 1000:8.1f} ms   +RSS {stats['rss_mb']:6.1f} MB   "
+              f"p50: {latencies}")
+    print(f"max |dp| native vs joblib: {diff:.3g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
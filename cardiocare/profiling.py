@@ -0,0 +1,231 @@
+"""Per-rerun profiles of the Streamlit app.
+
+Streamlit runs ``hp.py`` top to bottom on every interaction. With
+``CARDIOCARE_PROFILE=1``, each rerun is profiled twice over:
+
+- cProfile counts every call exactly. The hottest functions by own time are
+  listed in a sidebar expander, and the stats are saved as ``<mode>.prof``
+  (``snakeviz``, ``python -m pstats``, or the ``top`` command below).
+- A sampler thread records the script thread's stack every
+  ``CARDIOCARE_PROFILE_INTERVAL_MS`` (default 1). The samples are saved as
+  ``<mode>.folded``, the collapsed-stack format that ``flamegraph.pl``,
+  ``inferno-flamegraph`` and speedscope read.
+
+Both files go to ``CARDIOCARE_PROFILE_DIR`` (default ``.profiles/`` next to
+``hp.py``), named after the app mode, e.g. ``early_warning.prof``. The latest
+rerun of each mode overwrites its files. cProfile slows call-heavy code down
+more than the rest, so compare shares within one profile rather than against
+timings taken without it.
+
+Usage::
+
+    CARDIOCARE_PROFILE=1 streamlit run hp.py
+    flamegraph.pl .profiles/early_warning.folded > early_warning.svg
+    python -m cardiocare.profiling top .profiles/early_warning.prof -n 30
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from cardiocare.fused import DATA_DIR
+
+PROFILE = os.environ.get("CARDIOCARE_PROFILE", "0") not in ("", "0")
+PROFILE_DIR = os.environ.get("CARDIOCARE_PROFILE_DIR") or os.path.join(DATA_DIR, ".profiles")
+PROFILE_TOP_N = int(os.environ.get("CARDIOCARE_PROFILE_TOP_N", 25))
+PROFILE_INTERVAL_MS = float(os.environ.get("CARDIOCARE_PROFILE_INTERVAL_MS", 1))
+
+
+def profile_name(mode):
+    """File stem of an app mode, e.g. ``"Early Warning"`` -> ``"early_warning"``."""
+    return mode.lower().replace(" ", "_")
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled from a background thread.
+
+    Frames outside ``root_file`` (e.g. Streamlit's script runner) are cut off,
+    so every stack starts at the script's ``<module>``. Sampling ends with
+    ``stop()`` or once the thread has exited, after which ``on_thread_exit`` is
+    called from the sampler thread.
+    """
+
+    def __init__(self, thread_id, interval, root_file=None, on_thread_exit=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_file = root_file
+        self.on_thread_exit = on_thread_exit
+        self.stacks = Counter()
+        self._labels = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cardiocare-profile-sampler", daemon=True)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in sys.path:
+                if prefix and filename.startswith(prefix + os.sep):
+                    filename = filename[len(prefix) + 1:]
+                    break
+            # ';' separates frames in the collapsed format
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+        return label
+
+    def _run(self):
+        current_frames = sys._current_frames
+        while not self._stopped.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            if frame is None:
+                # The thread exited without stop(), e.g. a rerun cut short
+                if self.on_thread_exit is not None:
+                    self.on_thread_exit()
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(self._label(code))
+                if code.co_filename == self.root_file and code.co_name == "<module>":
+                    break
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+# Key of the running profile in the state passed to RerunProfile.start()
+_STATE_KEY = "_cardiocare_rerun_profile"
+_thread_state = threading.local()
+
+
+class RerunProfile:
+    """cProfile plus a stack sampler over the calling thread, from ``start()`` to ``stop()``."""
+
+    def __init__(self, root_file=None, interval_ms=PROFILE_INTERVAL_MS):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval_ms / 1000, root_file, on_thread_exit=self._abandon)
+        self.started = None
+        self._state = None
+
+    def start(self, state=None):
+        """Start profiling; ``state`` is a per-session mapping such as ``st.session_state``.
+
+        A rerun ended by ``st.stop()``, an exception or a new interaction never
+        reaches ``stop()``. Streamlit may run the session's next rerun on
+        another thread, so the running profile is kept in ``state`` (by
+        default, per thread) and the next ``start()`` cancels a leftover one.
+        """
+        self._state = _thread_state.__dict__ if state is None else state
+        previous = self._state.get(_STATE_KEY)
+        if previous is not None:
+            previous.cancel()
+        self.profiler.enable()
+        self.sampler.start()
+        self.started = time.perf_counter()
+        self._state[_STATE_KEY] = self
+        return self
+
+    def _abandon(self):
+        # From the sampler thread, once the profiled thread exited without stop(). Only the
+        # profiler is released here: the session state is only reachable from the session's
+        # script thread, so its next start() drops the entry
+        self.profiler.disable()
+
+    def _release(self):
+        if self._state is not None and self._state.get(_STATE_KEY) is self:
+            del self._state[_STATE_KEY]
+
+    def cancel(self):
+        """Stop profiling without writing anything; safe to call more than once."""
+        self.profiler.disable()
+        self.sampler.stop()
+        self._release()
+
+    def stop(self, mode, directory=PROFILE_DIR, top_n=PROFILE_TOP_N):
+        """Stop profiling, write ``<mode>.prof`` and ``<mode>.folded`` and return a summary.
+
+        The summary has the rerun's wall time, the sample count, both paths
+        and the ``top_n`` functions by own time (see ``hot_functions``).
+        """
+        self.profiler.disable()
+        self.sampler.stop()
+        seconds = time.perf_counter() - self.started
+        self._release()
+
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, profile_name(mode))
+        stats = pstats.Stats(self.profiler)
+        _replace(stem + ".prof", stats.dump_stats)
+        _replace(stem + ".folded", lambda path: write_folded(self.sampler.stacks, path))
+        return {"seconds": seconds, "samples": sum(self.sampler.stacks.values()),
+                "prof": stem + ".prof", "folded": stem + ".folded", "hot": hot_functions(stats, top_n)}
+
+
+def _replace(path, write):
+    # Sessions profiling the same mode at once each leave a complete file
+    fd, tmp_path = tempfile.mkstemp(prefix=".profile-", dir=os.path.dirname(path))
+    os.close(fd)
+    write(tmp_path)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def write_folded(stacks, path):
+    """Write ``{stack: samples}`` as ``frame;frame;frame count`` lines."""
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def hot_functions(stats, n=PROFILE_TOP_N):
+    """The ``n`` functions with the most own time in ``stats``, as table rows."""
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({"Function": name if filename == "~" else f"{name} ({os.path.basename(filename)}:{line})",
+                     "Calls": calls, "Own (ms)": round(own * 1000, 2), "Cumulative (ms)": round(cumulative * 1000, 2)})
+    rows.sort(key=lambda row: -row["Own (ms)"])
+    return rows[:n]
+
+
+def start_rerun_profile(root_file=None, state=None):
+    """A started :class:`RerunProfile` of this thread if ``CARDIOCARE_PROFILE`` is set, else ``None``.
+
+    ``state`` is passed to :meth:`RerunProfile.start`.
+    """
+    if not PROFILE:
+        return None
+    try:
+        return RerunProfile(root_file).start(state)
+    except ValueError:
+        # Python 3.12+ allows one cProfile at a time; another session is being profiled
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect CardioCare rerun profiles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    top_parser = sub.add_parser("top", help="Hottest functions of a saved .prof file")
+    top_parser.add_argument("path")
+    top_parser.add_argument("-n", type=int, default=PROFILE_TOP_N)
+    args = parser.parse_args(argv)
+
+    if args.command == "top":
+        print(f"{'own ms':>9s} {'cum ms':>9s} {'calls':>8s}  function")
+        for row in hot_functions(pstats.Stats(args.path), args.n):
+            print(f"{row['Own (ms)']:9.2f} {row['Cumulative (ms)']:9.2f} {row['Calls']:8d}  {row['Function']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
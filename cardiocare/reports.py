@@ -0,0 +1,350 @@
+"""PDF assessment reports, one patient at a time or in bulk.
+
+``generate_pdf_report`` is the report the app offers after each assessment.
+``bulk_reports`` renders the same layout for every row of a cohort scored by
+``cardiocare.batch`` across a process pool and writes the result either as a
+zip of per-patient PDFs or as multi-patient PDFs. :class:`ReportCache` keeps
+rendered reports so a rerun with unchanged inputs does not render again.
+
+Usage::
+
+    python -m cardiocare.batch cohort.csv scored.csv
+    python -m cardiocare.reports scored.csv reports.zip
+    python -m cardiocare.reports scored.csv reports.pdf --mode "Heart Disease"
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from cardiocare.features import EARLY_SCHEMA, HEART_DISEASE_SCHEMA
+from cardiocare.tracing import traced
+
+MODES = ["Early Warning", "Heart Disease"]
+
+# Schema and features listed under "Patient Information" for each mode; features
+# missing from a cohort are left out
+REPORT_FEATURES = {
+    "Early Warning": (EARLY_SCHEMA, ["age", "sex", "trestbps", "chol", "fbs", "thalach"]),
+    "Heart Disease": (HEART_DISEASE_SCHEMA, ["age", "sex", "trestbps", "chol", "bmi", "diabetes", "family_history",
+                                             "cp", "restecg", "slope", "ca", "thal"])
+}
+
+# Default bound on the PDF bytes held by a ReportCache
+DEFAULT_REPORT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Patients per pool task when writing a zip
+ZIP_BATCH_SIZE = 64
+# Patients per file when writing multi-patient PDFs
+DEFAULT_VOLUME_SIZE = 1000
+
+
+def recommendations(mode, prediction, values):
+    """Clinical recommendations shown in the app and the report."""
+    if mode == "Early Warning":
+        smoker = EARLY_SCHEMA["smoking"].display(values["smoking"]) == "Yes"
+        return [
+            "Consult a cardiologist within 2 weeks" if prediction == 1 else "Annual cardiac check-up",
+            "Schedule ECG and stress test" if prediction == 1 else "Continue healthy habits",
+            "Begin blood pressure monitoring",
+            "Consult nutritionist for diet plan",
+            "Smoking cessation program" if smoker else "Maintain non-smoking status"
+        ]
+    return [
+        "Cardiology consultation within 1 week" if prediction == 1 else "Annual physical exam",
+        "Complete lipid profile" if prediction == 1 else "Biannual lipid profile",
+        "Stress echocardiogram" if prediction == 1 else "Regular blood pressure checks",
+        "Possible statin therapy" if prediction == 1 else "Maintain healthy diet",
+        "Cardiac rehabilitation referral" if prediction == 1 else "150 mins exercise/week"
+    ]
+
+
+# === REPORT LAYOUT ===
+def add_report_page(pdf, patient_data, prediction_data, mode):
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    # Header
+    pdf.set_fill_color(0, 95, 115)
+    pdf.set_text_color(255, 255, 255)
+    pdf.cell(0, 15, "CardioCare AI - Cardiac Risk Assessment Report", 0, 1, 'C', 1)
+    pdf.ln(10)
+
+    # Patient Information
+    pdf.set_fill_color(240, 240, 240)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Patient Information", 0, 1)
+    pdf.set_font("Arial", size=12)
+
+    # Add patient data
+    for key, value in patient_data.items():
+        pdf.cell(0, 8, f"{key}: {value}", 0, 1)
+
+    pdf.ln(5)
+
+    # Prediction Results
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Prediction Results", 0, 1)
+    pdf.set_font("Arial", size=12)
+
+    risk_level = "High Risk" if prediction_data['prediction'] == 1 else "Low Risk"
+    pdf.cell(0, 8, f"Risk Level: {risk_level}", 0, 1)
+    pdf.cell(0, 8, f"Probability: {prediction_data['probability']:.1%}", 0, 1)
+    pdf.cell(0, 8, f"Assessment Type: {'Early Warning' if mode == 'Early Warning' else 'Comprehensive Heart Disease'}",
+             0, 1)
+
+    pdf.ln(5)
+
+    # Recommendations
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "Clinical Recommendations", 0, 1)
+    pdf.set_font("Arial", size=12)
+
+    for rec in prediction_data['recommendations']:
+        pdf.cell(0, 8, f"- {rec}", 0, 1)
+
+    # Footer
+    pdf.ln(10)
+    pdf.set_font("Arial", 'I', 10)
+    pdf.cell(0, 8, f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 0, 1)
+    pdf.cell(0, 8, "CardioCare AI - Advanced Cardiac Risk Assessment", 0, 1, 'C')
+
+
+@traced("report.pdf")
+def generate_pdf_report(patient_data, prediction_data, mode):
+    # fpdf (and the fonts it loads) is only needed once a report is rendered
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    add_report_page(pdf, patient_data, prediction_data, mode)
+    # fpdf2 returns a bytearray
+    return bytes(pdf.output())
+
+
+# === REPORT CACHE ===
+def report_key(patient_data, prediction_data, mode):
+    """Content hash of a report's inputs.
+
+    Key order is kept, since it is the line order on the page. Values that are
+    not JSON types (e.g. NumPy scalars) are hashed by their ``str``.
+    """
+    payload = json.dumps([patient_data, prediction_data, mode], default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """LRU cache of rendered report bytes, bounded by total size.
+
+    A cached report keeps the "generated on" time of its first render.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_REPORT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, patient_data, prediction_data, mode):
+        """Return the report for these inputs, rendering it only on a miss."""
+        key = report_key(patient_data, prediction_data, mode)
+        with self._lock:
+            pdf_bytes = self._reports.get(key)
+            if pdf_bytes is not None:
+                self._reports.move_to_end(key)
+                self.hits += 1
+                return pdf_bytes
+            self.misses += 1
+
+        # Render outside the lock so other sessions are not serialized behind it
+        pdf_bytes = generate_pdf_report(patient_data, prediction_data, mode)
+        with self._lock:
+            if key not in self._reports and len(pdf_bytes) <= self.max_bytes:
+                self._reports[key] = pdf_bytes
+                self.resident_bytes += len(pdf_bytes)
+                while self.resident_bytes > self.max_bytes:
+                    _, evicted = self._reports.popitem(last=False)
+                    self.resident_bytes -= len(evicted)
+        return pdf_bytes
+
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+            self.resident_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "reports": len(self._reports),
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None
+            }
+
+
+# === BULK REPORTS ===
+def _init_worker():
+    # The layout uses the fpdf 1.x style API (Arial, ln=1), which fpdf2 warns about on every page
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+def _render_each(reports, mode):
+    return [(name, generate_pdf_report(patient_data, prediction_data, mode))
+            for name, patient_data, prediction_data in reports]
+
+
+def _render_volume(reports, mode):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    for _, patient_data, prediction_data in reports:
+        add_report_page(pdf, patient_data, prediction_data, mode)
+    return bytes(pdf.output())
+
+
+def cohort_reports(input_path, mode="Early Warning", id_column="id", name_column="name", chunksize=5000):
+    """Yield ``(patient_id, patient_data, prediction_data)`` for each row of a scored CSV.
+
+    The CSV needs ``risk_label`` and ``risk_probability`` as written by
+    ``cardiocare.batch``. Rows without an ``id_column`` are numbered from 1.
+    """
+    schema, features = REPORT_FEATURES[mode]
+    row_number = 0
+    for chunk in pd.read_csv(input_path, chunksize=chunksize):
+        names = [name for name in features if name in chunk.columns]
+        for values in chunk.to_dict("records"):
+            row_number += 1
+            patient_id = str(values[id_column]) if id_column in values else str(row_number)
+            patient_data = {"Patient ID": patient_id}
+            if name_column in values:
+                patient_data["Patient Name"] = values[name_column]
+            patient_data.update(schema.describe(values, names))
+
+            prediction = int(values["risk_label"])
+            yield patient_id, patient_data, {
+                "prediction": prediction,
+                "probability": float(values["risk_probability"]),
+                "recommendations": recommendations(mode, prediction, values)
+            }
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bulk_reports(input_path, output_path, mode="Early Warning", fmt=None, workers=None,
+                 volume_size=DEFAULT_VOLUME_SIZE, id_column="id", name_column="name"):
+    """Render a report for every patient of a scored cohort across a process pool.
+
+    ``fmt="zip"`` writes one ``CardioCare_Report_<id>.pdf`` per patient into
+    ``output_path``; ``fmt="pdf"`` writes multi-patient PDFs of up to
+    ``volume_size`` patients, named ``<stem>-0001.pdf`` and so on when the cohort
+    needs more than one. ``fmt`` defaults to the output extension.
+
+    At most two tasks per worker are in flight and results are written in input
+    order as they complete, so memory is bounded by the batch size rather than
+    the cohort size. Returns a dict with ``reports``, ``files``, ``seconds`` and
+    ``reports_per_sec``.
+    """
+    fmt = fmt or ("pdf" if output_path.lower().endswith(".pdf") else "zip")
+    if fmt not in ("zip", "pdf"):
+        raise ValueError(f"Unknown bulk report format {fmt!r}; expected 'zip' or 'pdf'")
+    workers = workers or os.cpu_count() or 1
+    render, batch_size = (_render_each, ZIP_BATCH_SIZE) if fmt == "zip" else (_render_volume, volume_size)
+
+    stem, extension = os.path.splitext(output_path)
+    volumes = []
+    seen = set()
+    reports = 0
+
+    def write(result):
+        nonlocal reports
+        if fmt == "pdf":
+            volumes.append(f"{stem}-{len(volumes) + 1:04d}{extension or '.pdf'}")
+            with open(volumes[-1], "wb") as f:
+                f.write(result)
+            return
+        for patient_id, pdf_bytes in result:
+            name = f"CardioCare_Report_{patient_id}.pdf"
+            if name in seen:
+                name = f"CardioCare_Report_{patient_id}_{reports + 1}.pdf"
+            seen.add(name)
+            # fpdf2 already deflates page content, so the zip only stores
+            archive.writestr(name, pdf_bytes)
+            reports += 1
+
+    start = time.perf_counter()
+    archive = zipfile.ZipFile(output_path, "w", zipfile.ZIP_STORED) if fmt == "zip" else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = deque()
+            for batch in _batches(cohort_reports(input_path, mode, id_column, name_column), batch_size):
+                if fmt == "pdf":
+                    reports += len(batch)
+                pending.append(pool.submit(render, batch, mode))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    finally:
+        if archive is not None:
+            archive.close()
+
+    # A cohort that fits in one volume is written to output_path itself
+    if len(volumes) == 1:
+        os.replace(volumes[0], output_path)
+        volumes = [output_path]
+
+    seconds = time.perf_counter() - start
+    return {
+        "reports": reports,
+        "files": len(volumes) if fmt == "pdf" else 1,
+        "seconds": seconds,
+        "reports_per_sec": reports / seconds if seconds > 0 else float("inf")
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render PDF reports for a cohort scored by cardiocare.batch.")
+    parser.add_argument("input", help="Scored CSV with risk_label and risk_probability columns")
+    parser.add_argument("output", help="reports.zip (one PDF per patient) or reports.pdf (multi-patient PDFs)")
+    parser.add_argument("--mode", choices=MODES, default="Early Warning")
+    parser.add_argument("--format", choices=["zip", "pdf"], help="Defaults to the output extension")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--volume-size", type=int, default=DEFAULT_VOLUME_SIZE,
+                        help="Patients per multi-patient PDF")
+    parser.add_argument("--id-column", default="id")
+    parser.add_argument("--name-column", default="name")
+    args = parser.parse_args(argv)
+
+    stats = bulk_reports(args.input, args.output, mode=args.mode, fmt=args.format, workers=args.workers,
+                         volume_size=args.volume_size, id_column=args.id_column, name_column=args.name_column)
+    print(f"Rendered {stats['reports']} reports into {stats['files']} file(s) in {stats['seconds']:.2f}s "
+          f"({stats['reports_per_sec']:,.0f} reports/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
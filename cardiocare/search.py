@@ -0,0 +1,200 @@
+"""Hyperparameter search for ``cardiocare.train``.
+
+``grid_search`` is the exhaustive ``GridSearchCV`` of ``hdt.ipynb``: its cost
+is the product of the grid sizes times the folds. ``halving_search`` is
+successive halving over boosting rounds instead. It samples ``n_configs``
+configurations from ``SEARCH_SPACE`` and trains them all for a few rounds. It
+keeps the best ``1/eta`` and trains those ``eta`` times longer, until one
+configuration gets ``MAX_ESTIMATORS`` rounds. A ``budget`` in seconds stops
+new trials from starting; the best configuration of the highest rung reached
+is used.
+
+Every finished trial is written to a SQLite checkpoint, keyed by a hash of the
+training data and search settings, so an interrupted or out-of-budget search
+resumes where it stopped when run again with the same settings.
+"""
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import joblib
+import numpy as np
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import GridSearchCV
+from xgboost import XGBClassifier
+
+MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 30
+
+HALVING_CONFIGS = 27
+HALVING_ETA = 3
+
+# Parameter -> (distribution, low, high) sampled by halving_search; a sampled
+# value replaces the model's fixed one in TRAINING_SPECS (e.g. colsample_bytree for hd)
+SEARCH_SPACE = {
+    "max_depth": ("int", 3, 8),
+    "learning_rate": ("log", 0.01, 0.3),
+    "subsample": ("uniform", 0.6, 1.0),
+    "colsample_bytree": ("uniform", 0.6, 1.0),
+    "min_child_weight": ("log", 1, 10)
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS trials (
+    search TEXT NOT NULL,
+    config INTEGER NOT NULL,
+    rung INTEGER NOT NULL,
+    params TEXT NOT NULL,
+    rounds INTEGER NOT NULL,
+    best_rounds INTEGER NOT NULL,
+    score REAL NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (search, config, rung)
+);
+"""
+
+
+def grid_search(spec, X_fit, y_fit, X_valid, y_valid, base_params, n_jobs, cv=3):
+    """``GridSearchCV`` over ``spec["grid"]`` with early stopping on the validation set.
+
+    Candidates run on joblib's threading backend (XGBoost releases the GIL).
+    Returns ``(best_params, best_rounds, info)``.
+    """
+    estimator = XGBClassifier(**base_params, n_estimators=MAX_ESTIMATORS,
+                              early_stopping_rounds=EARLY_STOPPING_ROUNDS, n_jobs=1)
+    grid = GridSearchCV(estimator, param_grid=spec["grid"], cv=cv, scoring=spec["scoring"], n_jobs=n_jobs)
+    with joblib.parallel_backend("threading", n_jobs=n_jobs):
+        grid.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+    info = {"method": "grid", "candidates": len(grid.cv_results_["params"]), "cv": cv,
+            "scoring": spec["scoring"], "best_score": float(grid.best_score_),
+            "early_stopping_rounds": EARLY_STOPPING_ROUNDS}
+    return grid.best_params_, grid.best_estimator_.best_iteration + 1, info
+
+
+def sample_configs(n, seed, space=SEARCH_SPACE):
+    """``n`` parameter dicts drawn from ``space``; the same seed gives the same list."""
+    rng = np.random.RandomState(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for name, (kind, low, high) in space.items():
+            if kind == "int":
+                config[name] = int(rng.randint(low, high + 1))
+            elif kind == "log":
+                config[name] = round(float(np.exp(rng.uniform(np.log(low), np.log(high)))), 4)
+            else:
+                config[name] = round(float(rng.uniform(low, high)), 4)
+        configs.append(config)
+    return configs
+
+
+def halving_rungs(n_configs=HALVING_CONFIGS, eta=HALVING_ETA, max_rounds=MAX_ESTIMATORS):
+    """``[(configs kept, boosting rounds)]`` per rung, ending with one config at ``max_rounds``."""
+    top = int(math.log(n_configs, eta) + 1e-9)
+    return [(max(1, n_configs // eta ** i), max(1, round(max_rounds / eta ** (top - i)))) for i in range(top + 1)]
+
+
+class SearchCheckpoint:
+    """Finished trials in SQLite, so a search can resume after an interruption."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA_SQL)
+
+    def trials(self, search):
+        """``{(config, rung): (score, best_rounds)}`` of ``search``."""
+        rows = self.conn.execute("SELECT config, rung, score, best_rounds FROM trials WHERE search = ?", (search,))
+        return {(config, rung): (score, best_rounds) for config, rung, score, best_rounds in rows}
+
+    def record(self, search, config, rung, params, rounds, best_rounds, score, seconds):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              (search, config, rung, json.dumps(params), rounds, best_rounds, score, seconds))
+
+    def close(self):
+        self.conn.close()
+
+
+def _search_key(X_fit, y_fit, X_valid, y_valid, base_params, scoring, configs, rungs):
+    digest = hashlib.sha256()
+    for array in (X_fit, y_fit, X_valid, y_valid):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(json.dumps([base_params, scoring, configs, rungs], sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+def halving_search(spec, X_fit, y_fit, X_valid, y_valid, base_params, n_jobs, checkpoint_path,
+                   budget=None, seed=42, n_configs=HALVING_CONFIGS, eta=HALVING_ETA):
+    """Successive halving over boosting rounds, scored by ``spec["scoring"]`` on the validation set.
+
+    Trials run ``n_jobs`` at a time in threads. With ``budget`` (seconds), no
+    trial starts after the budget is spent. Returns ``(best_params,
+    best_rounds, info)`` for the best configuration of the highest rung with
+    results.
+    """
+    configs = sample_configs(n_configs, seed)
+    rungs = halving_rungs(n_configs, eta)
+    scorer = get_scorer(spec["scoring"])
+    search = _search_key(X_fit, y_fit, X_valid, y_valid, base_params, spec["scoring"], configs, rungs)
+    checkpoint = SearchCheckpoint(checkpoint_path)
+    done = checkpoint.trials(search)
+    resumed = len(done)
+    deadline = None if budget is None else time.perf_counter() + budget
+
+    def run_trial(config, rounds):
+        start = time.perf_counter()
+        model = XGBClassifier(**{**base_params, **configs[config]}, n_estimators=rounds,
+                              early_stopping_rounds=EARLY_STOPPING_ROUNDS, n_jobs=1)
+        model.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+        return float(scorer(model, X_valid, y_valid)), model.best_iteration + 1, time.perf_counter() - start
+
+    survivors = list(range(n_configs))
+    reached = None
+    out_of_budget = False
+    with ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix="cardiocare-search") as executor:
+        for rung, (keep, rounds) in enumerate(rungs):
+            survivors = survivors[:keep]
+            pending = [config for config in survivors if (config, rung) not in done]
+            running = {}
+            while pending or running:
+                while pending and len(running) < n_jobs and not out_of_budget:
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        out_of_budget = True
+                        break
+                    config = pending.pop(0)
+                    running[executor.submit(run_trial, config, rounds)] = config
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    config = running.pop(future)
+                    score, best_rounds, seconds = future.result()
+                    checkpoint.record(search, config, rung, configs[config], rounds, best_rounds, score, seconds)
+                    done[(config, rung)] = (score, best_rounds)
+
+            scored = [config for config in survivors if (config, rung) in done]
+            if scored:
+                reached = rung
+            if out_of_budget or len(scored) < len(survivors):
+                break
+            survivors = sorted(scored, key=lambda config: -done[(config, rung)][0])
+    checkpoint.close()
+
+    if reached is None:
+        raise RuntimeError("The search budget ran out before any trial finished")
+    best = max((config for config in range(n_configs) if (config, reached) in done),
+               key=lambda config: done[(config, reached)][0])
+    score, best_rounds = done[(best, reached)]
+    info = {"method": "halving", "search_id": search, "configs": n_configs, "eta": eta,
+            "rungs": [{"configs": keep, "rounds": rounds} for keep, rounds in rungs],
+            "rung_reached": reached, "complete": reached == len(rungs) - 1 and not out_of_budget,
+            "trials": len(done), "resumed_trials": resumed, "budget_s": budget,
+            "scoring": spec["scoring"], "best_score": score, "early_stopping_rounds": EARLY_STOPPING_ROUNDS,
+            "checkpoint": os.path.abspath(checkpoint_path)}
+    return configs[best], best_rounds, info
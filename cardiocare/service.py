@@ -0,0 +1,367 @@
+"""Async HTTP inference service for the CardioCare models.
+
+``POST /predict/early`` and ``POST /predict/heart-disease`` take either one
+patient as a JSON object of ``{feature: label or number}`` or a batch as
+``{"patients": [...]}``. Each worker process loads the models once at
+startup, on the backend set by ``CARDIOCARE_BACKEND`` (see
+``cardiocare.backends``). Small requests are micro-batched across concurrent
+callers and large ones run on a thread pool, so the event loop keeps accepting
+requests while XGBoost works.
+
+With ``serve --preload``, the models are loaded once in a parent process that
+then forks the workers. The workers share the parent's model and library pages
+copy-on-write instead of each unpickling its own copy; compare the memory of
+both topologies with ``python -m cardiocare.memory``.
+
+Usage::
+
+    python -m cardiocare.service serve --workers 4
+    python -m cardiocare.service serve --workers 4 --preload
+    python -m cardiocare.service loadtest --concurrency 32 --batch 1
+
+or, with an ASGI server of your choice, ``uvicorn cardiocare.service:app``.
+With ``CARDIOCARE_TRACING=1``, ``GET /metrics`` serves the worker's span
+histograms (see ``cardiocare.tracing``).
+"""
+import argparse
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Union
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from cardiocare.backends import BACKEND, backend_artifacts, load_model, model_version
+from cardiocare.batching import BATCH_MAX_ROWS, BATCH_MAX_WAIT_MS, MicroBatcher
+from cardiocare.cache import PredictionCache
+from cardiocare.features import SchemaError
+from cardiocare.fused import BUNDLED_CSVS
+from cardiocare.models import MODEL_DIR, ModelRegistry
+from cardiocare.tracing import close_outputs, prometheus_text, start_exporters
+
+# Endpoint -> model in cardiocare.backends.MODELS
+ENDPOINTS = {
+    "early": "early",
+    "heart-disease": "hd"
+}
+
+MAX_BATCH_SIZE = 10_000
+# Exit status of a worker whose app failed to start (as uvicorn uses)
+STARTUP_FAILURE = 3
+
+Patient = Dict[str, Union[float, str]]
+
+
+class BatchRequest(BaseModel):
+    patients: List[Patient] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+# === SCORING ===
+def load_endpoint_models(base_dir=MODEL_DIR, backend=BACKEND):
+    """``({endpoint: FusedModel}, {endpoint: model version})`` for every endpoint.
+
+    Each model is checked against the golden sample; a mismatch raises
+    :class:`~cardiocare.backends.BackendParityError`.
+    """
+    registry = ModelRegistry(base_dir)
+    for future in registry.warm(backend_artifacts(backend)):
+        future.result()
+    models = {endpoint: load_model(registry, name, backend) for endpoint, name in ENDPOINTS.items()}
+    versions = {endpoint: model_version(registry, name, backend) for endpoint, name in ENDPOINTS.items()}
+    return models, versions
+
+
+class Scorer:
+    """The fused models of one worker process and the threads they run on.
+
+    Rows already in the :class:`~cardiocare.cache.PredictionCache` are not
+    scored again. Requests of up to ``max_batch_rows`` rows are coalesced across
+    concurrent requests by a :class:`~cardiocare.batching.MicroBatcher` per
+    model; larger batches are scored directly on the thread pool.
+
+    ``models`` takes the result of :func:`load_endpoint_models` from a parent
+    process; by default the models are loaded here.
+    """
+
+    def __init__(self, base_dir=MODEL_DIR, threads=None, max_batch_rows=BATCH_MAX_ROWS,
+                 max_wait_ms=BATCH_MAX_WAIT_MS, backend=BACKEND, models=None):
+        self.backend = backend
+        # A golden sample mismatch fails startup
+        self.models, self.versions = models or load_endpoint_models(base_dir, backend)
+        self.cache = PredictionCache()
+        self.batchers = {
+            endpoint: MicroBatcher(fused.predict_proba, max_batch_rows, max_wait_ms, name=f"batcher-{endpoint}")
+            for endpoint, fused in self.models.items()
+        }
+        self.executor = ThreadPoolExecutor(max_workers=threads or os.cpu_count(),
+                                           thread_name_prefix="cardiocare-score")
+
+    def encode(self, endpoint, patients):
+        """Encode a list of feature dicts; raises ``SchemaError`` on invalid input."""
+        fused = self.models[endpoint]
+        return np.vstack([fused.row(patient) for patient in patients])
+
+    def results(self, endpoint, prob):
+        labels = self.models[endpoint].label(prob)
+        return [{"risk_label": int(label), "risk_level": "High" if label else "Low", "risk_probability": float(p)}
+                for label, p in zip(labels, prob)]
+
+    def score(self, endpoint, patients):
+        X = self.encode(endpoint, patients)
+        prob = self.cache.get_many(self.versions[endpoint], X)
+        missing = [i for i, p in enumerate(prob) if p is None]
+        if missing:
+            scored = self.models[endpoint].predict_proba(X[missing])
+            self.cache.put_many(self.versions[endpoint], X[missing], scored)
+            for i, p in zip(missing, scored):
+                prob[i] = p
+        return self.results(endpoint, np.array(prob))
+
+    async def score_async(self, endpoint, patients):
+        batcher = self.batchers[endpoint]
+        if len(patients) > batcher.max_rows:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.score, endpoint, patients)
+
+        # Encoding and cache lookups for a few rows are cheap enough for the event loop;
+        # the batcher thread does the scoring
+        X = self.encode(endpoint, patients)
+        prob = self.cache.get_many(self.versions[endpoint], X)
+        missing = [i for i, p in enumerate(prob) if p is None]
+        if missing:
+            scored = await asyncio.wrap_future(batcher.submit(X[missing]))
+            self.cache.put_many(self.versions[endpoint], X[missing], scored)
+            for i, p in zip(missing, scored):
+                prob[i] = p
+        return self.results(endpoint, np.array(prob))
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+        self.executor.shutdown(wait=False)
+
+
+# === APP ===
+def create_app(base_dir=MODEL_DIR, threads=None, models=None):
+    """Build the ASGI app; models are loaded when the app starts, once per process.
+
+    Pass ``models`` from :func:`load_endpoint_models` to use models that are
+    already loaded instead.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app):
+        start_exporters()
+        app.state.scorer = Scorer(base_dir, threads, models=models)
+        try:
+            yield
+        finally:
+            app.state.scorer.close()
+
+    app = FastAPI(title="CardioCare AI", lifespan=lifespan)
+
+    async def predict(endpoint, payload):
+        batch = isinstance(payload, BatchRequest)
+        try:
+            results = await app.state.scorer.score_async(endpoint, payload.patients if batch else [payload])
+        except SchemaError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+        threshold = app.state.scorer.models[endpoint].threshold
+        if batch:
+            return {"model": endpoint, "threshold": threshold, "predictions": results}
+        return {"model": endpoint, "threshold": threshold, **results[0]}
+
+    @app.get("/health")
+    async def health():
+        scorer = app.state.scorer
+        return {"status": "ok", "backend": scorer.backend, "models": scorer.versions, "prediction_cache": scorer.cache.stats()}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        # Span histograms of this worker process; empty unless CARDIOCARE_TRACING is set
+        return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    @app.post("/predict/early")
+    async def predict_early(payload: Union[BatchRequest, Patient]):
+        return await predict("early", payload)
+
+    @app.post("/predict/heart-disease")
+    async def predict_heart_disease(payload: Union[BatchRequest, Patient]):
+        return await predict("heart-disease", payload)
+
+    return app
+
+
+def __getattr__(name):
+    # ``app`` for ``uvicorn cardiocare.service:app``, built on first use rather than on every import
+    global app
+    if name == "app":
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# === PREFORK ===
+def _stop_worker(signum, frame):
+    # Also what uvicorn's re-raised stop signal calls once the server has shut down
+    raise SystemExit(0)
+
+
+def serve_preforked(host="127.0.0.1", port=8000, workers=1, base_dir=MODEL_DIR, threads=None):
+    """Load the models once, then fork ``workers`` uvicorn workers that share them.
+
+    The parent binds the socket and loads and checks the models before forking,
+    so every worker starts with them already in memory. Pages the workers only
+    read (the boosters, the scaler arrays, imported modules) stay shared with
+    the parent copy-on-write. ``gc.freeze()`` keeps the workers' garbage
+    collector from writing to the headers of the parent's objects, which would
+    copy their pages. The parent waits for the workers and passes SIGINT and
+    SIGTERM on to them.
+    """
+    import uvicorn
+
+    models = load_endpoint_models(base_dir)
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+
+    gc.collect()
+    gc.freeze()
+    pids = []
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    # Installed before the first fork, so a signal during the loop stops the workers already started
+    signals = {signal.SIGINT, signal.SIGTERM}
+    previous = {signum: signal.signal(signum, stop) for signum in signals}
+    for _ in range(workers):
+        if stopping:
+            break
+        # Held back until the new worker is in pids, or in the worker until its own handlers are in
+        signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+        pid = os.fork()
+        if pid == 0:
+            for signum in signals:
+                signal.signal(signum, _stop_worker)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+            status = 1
+            try:
+                server = uvicorn.Server(uvicorn.Config(create_app(base_dir, threads, models)))
+                server.run(sockets=[sock])
+                status = 0 if server.started else STARTUP_FAILURE
+            except SystemExit as e:
+                # The exit status the interpreter gives sys.exit() and sys.exit("message")
+                status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                # os._exit skips atexit: write this worker's last metrics and trace lines first.
+                # It never returns into the parent's code
+                close_outputs()
+                os._exit(status)
+        pids.append(pid)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+
+    status = 0
+    for pid in pids:
+        _, wait_status = os.waitpid(pid, 0)
+        status = status or os.waitstatus_to_exitcode(wait_status)
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
+    sock.close()
+    return status
+
+
+# === LOAD TEST ===
+async def load_test(url, endpoint="early", requests=2000, concurrency=32, batch=1, csv_path=BUNDLED_CSVS[0]):
+    """Fire ``requests`` POSTs of ``batch`` patients each from ``concurrency`` clients.
+
+    Returns requests/sec, patients/sec and p50/p95/p99 latency in milliseconds.
+    """
+    import httpx
+    import pandas as pd
+
+    rows = pd.read_csv(csv_path, nrows=max(batch * 10, 1000)).to_dict("records")
+    payloads = []
+    for i in range(requests):
+        first = (i * batch) % (len(rows) - batch + 1)
+        payloads.append({"patients": rows[first:first + batch]} if batch > 1 else rows[first])
+    latencies = []
+
+    async def client_loop(client, queue):
+        while queue:
+            payload = queue.pop()
+            start = time.perf_counter()
+            response = await client.post(f"{url}/predict/{endpoint}", json=payload)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, payloads) for _ in range(concurrency)))
+        seconds = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests_per_sec": requests / seconds,
+        "patients_per_sec": requests * batch / seconds,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve or load-test the CardioCare inference API.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Run the API with uvicorn")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=1, help="Worker processes")
+    serve.add_argument("--preload", action="store_true",
+                       help="Load the models once and fork the workers from that process (Unix only)")
+
+    load = sub.add_parser("loadtest", help="Benchmark a running server")
+    load.add_argument("--url", default="http://127.0.0.1:8000")
+    load.add_argument("--endpoint", choices=list(ENDPOINTS), default="early")
+    load.add_argument("--requests", type=int, default=2000)
+    load.add_argument("--concurrency", type=int, default=32)
+    load.add_argument("--batch", type=int, default=1, help="Patients per request")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        if args.preload:
+            return serve_preforked(args.host, args.port, args.workers)
+        import uvicorn
+        uvicorn.run("cardiocare.service:app", host=args.host, port=args.port, workers=args.workers)
+        return 0
+
+    stats = asyncio.run(load_test(args.url, args.endpoint, args.requests, args.concurrency, args.batch))
+    print(f"{stats['requests_per_sec']:,.0f} req/s ({stats['patients_per_sec']:,.0f} patients/s)   "
+          f"p50 = {stats['p50_ms']:.1f} ms   p95 = {stats['p95_ms']:.1f} ms   p99 = {stats['p99_ms']:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
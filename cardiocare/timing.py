@@ -0,0 +1,50 @@
+import time
+from contextlib import contextmanager
+
+from cardiocare.tracing import observe
+
+# Stages of one form assessment, in the order they normally run
+ASSESSMENT_STAGES = [
+    ("load", "Loading models"),
+    ("validate", "Validating inputs"),
+    ("scale", "Scaling features"),
+    ("predict", "Running risk model"),
+    ("pdf", "Building PDF report"),
+    ("charts", "Rendering charts")
+]
+
+
+class StageTimer:
+    """Wall-clock time per named stage.
+
+    Entering a stage that already ran adds to its total, so work split across
+    the page (e.g. two charts) is reported as one stage. ``on_stage`` is called
+    as ``on_stage(stages_started, label)`` whenever a stage is entered. Every
+    stage is also recorded as the ``assessment.<name>`` span of
+    ``cardiocare.tracing``.
+    """
+
+    def __init__(self, stages=ASSESSMENT_STAGES, on_stage=None):
+        self.labels = dict(stages)
+        self.timings = {}
+        self.on_stage = on_stage
+
+    @contextmanager
+    def stage(self, name):
+        if self.on_stage is not None:
+            self.on_stage(len(self.timings) + (name not in self.timings), self.labels.get(name, name))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            observe(f"assessment.{name}", elapsed, start)
+
+    def total(self):
+        return sum(self.timings.values())
+
+    def rows(self):
+        """Timings as ``[{"Stage": label, "Time (ms)": ms}, ...]`` in the order they ran."""
+        return [{"Stage": self.labels.get(name, name), "Time (ms)": round(seconds * 1000, 2)}
+                for name, seconds in self.timings.items()]
@@ -0,0 +1,405 @@
+"""Span timings as Prometheus histograms, with an optional JSONL trace log.
+
+``span(name)`` is a context manager and ``traced(name)`` a decorator. Both
+record the wall-clock time of a block into a per-name histogram. Timings that
+are already measured elsewhere (e.g. by ``StageTimer``) go in through
+``observe(name, seconds)``. ``prometheus_text()`` renders every histogram in
+the Prometheus text exposition format.
+
+Tracing is off unless ``CARDIOCARE_TRACING=1`` or one of the outputs below is
+configured. When it is off, ``traced`` returns the function unchanged and
+``span`` returns a shared no-op context manager, so instrumented code pays
+nothing. The setting is read once at import, so set it before starting the
+process.
+
+Outputs, all optional:
+
+- ``CARDIOCARE_METRICS_PORT``: serve ``/metrics`` over HTTP on
+  ``CARDIOCARE_METRICS_HOST`` (default 127.0.0.1).
+- ``CARDIOCARE_METRICS_FILE``: rewrite the metrics to this file every
+  ``CARDIOCARE_METRICS_INTERVAL`` seconds (default 15) and at exit, e.g. for
+  node_exporter's textfile collector.
+- ``CARDIOCARE_TRACE_LOG``: append one line per span in the Chrome trace event
+  format (``{"name", "ph": "X", "ts", "dur", "pid", "tid"}``, times in µs).
+  Wrap the lines in ``[...]`` to open them in Perfetto or chrome://tracing.
+
+Usage::
+
+    CARDIOCARE_METRICS_PORT=9464 streamlit run hp.py
+    curl -s localhost:9464/metrics
+    python -m cardiocare.tracing bench      # per-span overhead, on and off
+"""
+import argparse
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from functools import partial, wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACE_LOG = os.environ.get("CARDIOCARE_TRACE_LOG") or None
+METRICS_FILE = os.environ.get("CARDIOCARE_METRICS_FILE") or None
+METRICS_INTERVAL = float(os.environ.get("CARDIOCARE_METRICS_INTERVAL", 15))
+METRICS_PORT = int(os.environ.get("CARDIOCARE_METRICS_PORT", 0)) or None
+METRICS_HOST = os.environ.get("CARDIOCARE_METRICS_HOST", "127.0.0.1")
+TRACING = (os.environ.get("CARDIOCARE_TRACING", "0") not in ("", "0")
+           or any((TRACE_LOG, METRICS_FILE, METRICS_PORT)))
+
+METRIC_NAME = "cardiocare_span_seconds"
+# Histogram upper bounds in seconds, from a scaler call to a cold model load
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Trace log lines are written in batches of whole lines, so concurrent
+# processes appending to one file never interleave within a line
+LOG_BATCH_LINES = 256
+LOG_FLUSH_SECONDS = 1.0
+
+
+class Histogram:
+    """Count of observations per bucket of ``BUCKETS``, plus their sum."""
+
+    __slots__ = ("counts", "sum", "count", "lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        """``(cumulative bucket counts, sum, count)``, consistent with each other."""
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "histogram", "start")
+
+    def __init__(self, tracer, name, histogram):
+        self.tracer = tracer
+        self.name = name
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.histogram.observe(end - self.start)
+        if self.tracer.log_path is not None:
+            self.tracer._log(self.name, self.start, end)
+        return False
+
+
+class _TraceLog:
+    """Buffered, append-only trace event lines."""
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.pid = os.getpid()
+        # perf_counter() + offset = seconds since the epoch
+        self.offset = time.time() - time.perf_counter()
+        self.names = {}
+        self.lines = []
+        self.flushed = time.perf_counter()
+        self.lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A forked worker logs under its own pid; the parent still holds and writes its buffered lines
+        self.pid = os.getpid()
+        self.lines = []
+        self.lock = threading.Lock()
+
+    def write(self, name, start, end):
+        quoted = self.names.get(name)
+        if quoted is None:
+            quoted = self.names[name] = json.dumps(name)
+        line = (f'{{"name":{quoted},"ph":"X","ts":{(start + self.offset) * 1e6:.1f},'
+                f'"dur":{(end - start) * 1e6:.1f},"pid":{self.pid},"tid":{threading.get_native_id()}}}\n')
+        with self.lock:
+            self.lines.append(line)
+            if len(self.lines) < LOG_BATCH_LINES and end - self.flushed < LOG_FLUSH_SECONDS:
+                return
+            lines, self.lines = self.lines, []
+            self.flushed = end
+            os.write(self.fd, "".join(lines).encode())
+
+    def flush(self):
+        with self.lock:
+            lines, self.lines = self.lines, []
+            self.flushed = time.perf_counter()
+            if lines:
+                os.write(self.fd, "".join(lines).encode())
+
+    def close(self):
+        if self.fd is None:
+            return
+        self.flush()
+        os.close(self.fd)
+        self.fd = None
+
+
+class Tracer:
+    """Histograms of named spans.
+
+    A disabled tracer hands out no-op spans and leaves decorated functions
+    untouched. ``log_path`` appends every span to a JSONL trace log.
+    """
+
+    def __init__(self, enabled=TRACING, log_path=TRACE_LOG):
+        self.enabled = enabled
+        self.log_path = log_path if enabled else None
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.trace_log = _TraceLog(log_path) if self.log_path is not None else None
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def span(self, name):
+        """Context manager that records the time spent inside it as ``name``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, self.histogram(name))
+
+    def traced(self, name=None):
+        """Decorator recording every call of the function as ``name`` (default: its qualified name)."""
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+            histogram = self.histogram(span_name)
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Span(self, span_name, histogram):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def observe(self, name, seconds, start=None):
+        """Record a duration measured elsewhere; ``start`` is its ``perf_counter()`` start time."""
+        if not self.enabled:
+            return
+        self.histogram(name).observe(seconds)
+        if self.log_path is not None:
+            end = time.perf_counter() if start is None else start + seconds
+            self._log(name, end - seconds, end)
+
+    def _log(self, name, start, end):
+        self.trace_log.write(name, start, end)
+
+    def flush(self):
+        if self.trace_log is not None:
+            self.trace_log.flush()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def prometheus_text(self):
+        """All histograms in the Prometheus text exposition format (version 0.0.4)."""
+        lines = [f"# HELP {METRIC_NAME} Wall-clock time of CardioCare spans.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        bounds = [f"{bound:g}" for bound in BUCKETS] + ["+Inf"]
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative, total, count = histogram.snapshot()
+            label = json.dumps(name)
+            for bound, n in zip(bounds, cumulative):
+                lines.append(f'{METRIC_NAME}_bucket{{span={label},le="{bound}"}} {n}')
+            lines.append(f"{METRIC_NAME}_sum{{span={label}}} {total!r}")
+            lines.append(f"{METRIC_NAME}_count{{span={label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically replace ``path`` with the current metrics."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.prometheus_text())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+
+# === PROCESS-WIDE TRACER ===
+TRACER = Tracer()
+span = TRACER.span
+traced = TRACER.traced
+observe = TRACER.observe
+prometheus_text = TRACER.prometheus_text
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    tracer = TRACER
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.tracer.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host=METRICS_HOST, tracer=TRACER):
+    """Serve ``tracer``'s metrics at ``http://host:port/metrics`` from a daemon thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"tracer": tracer})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="cardiocare-metrics", daemon=True).start()
+    return server
+
+
+def _write_metrics_forever(path, interval, tracer):
+    while True:
+        time.sleep(interval)
+        tracer.write_prometheus(path)
+        tracer.flush()
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+# Final writes of the outputs, run once by close_outputs()
+_exit_writes = []
+
+
+def close_outputs():
+    """Write the metrics file one last time and flush and close the trace log.
+
+    Runs at interpreter exit. A process that ends with ``os._exit()`` skips
+    ``atexit`` handlers, so it calls this first (e.g. the forked workers of
+    ``cardiocare.service``). Later calls do nothing.
+    """
+    while _exit_writes:
+        _exit_writes.pop()()
+
+
+def start_exporters(tracer=TRACER):
+    """Start the outputs configured in the environment, once per process.
+
+    Safe to call on every Streamlit rerun. A port already taken (e.g. by
+    another worker on the host) is reported on stderr and skipped.
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started or not tracer.enabled:
+            return
+        _exporters_started = True
+    if METRICS_PORT is not None:
+        try:
+            serve_metrics(METRICS_PORT, METRICS_HOST, tracer)
+        except OSError as e:
+            print(f"cardiocare.tracing: not serving metrics on {METRICS_HOST}:{METRICS_PORT}: {e}", file=sys.stderr)
+    if METRICS_FILE is not None:
+        threading.Thread(target=_write_metrics_forever, args=(METRICS_FILE, METRICS_INTERVAL, tracer),
+                         name="cardiocare-metrics-file", daemon=True).start()
+        _exit_writes.append(partial(tracer.write_prometheus, METRICS_FILE))
+
+
+if TRACER.trace_log is not None:
+    _exit_writes.append(TRACER.trace_log.close)
+atexit.register(close_outputs)
+
+
+# === OVERHEAD BENCHMARK ===
+def _per_call_ns(fn, n):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        fn(n)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / n
+
+
+def benchmark(n=200_000):
+    """``{case: ns per call}`` for spans and decorated calls, with tracing off, on and logging."""
+    log_dir = tempfile.mkdtemp(prefix="cardiocare-trace-")
+    tracers = {"off": Tracer(enabled=False), "on": Tracer(enabled=True),
+               "on+log": Tracer(enabled=True, log_path=os.path.join(log_dir, "trace.jsonl"))}
+
+    def noop():
+        pass
+
+    def bare(n):
+        for _ in range(n):
+            noop()
+
+    baseline = _per_call_ns(bare, n)
+    results = {}
+    for label, tracer in tracers.items():
+        def spans(n, span=tracer.span):
+            for _ in range(n):
+                with span("bench"):
+                    pass
+
+        def calls(n, fn=tracer.traced("bench")(noop)):
+            for _ in range(n):
+                fn()
+
+        results[f"span[{label}]"] = _per_call_ns(spans, n) - baseline
+        results[f"traced[{label}]"] = _per_call_ns(calls, n) - baseline
+        if tracer.trace_log is not None:
+            tracer.trace_log.close()
+    for name in os.listdir(log_dir):
+        os.remove(os.path.join(log_dir, name))
+    os.rmdir(log_dir)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CardioCare span tracing.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="Per-span overhead with tracing off, on and logging")
+    bench_parser.add_argument("-n", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        for case, ns in benchmark(args.n).items():
+            print(f"{case:16s} {ns:8.0f} ns")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
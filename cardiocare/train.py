@@ -0,0 +1,321 @@
+"""Training for the early-warning and heart-disease models.
+
+The pipeline of ``hdt.ipynb``: a stratified 80/20 split, a ``StandardScaler``
+fitted on the training part, SMOTE for the early-warning model,
+``scale_pos_weight`` for class imbalance, a cross-validated grid search over
+XGBoost and the F1-optimal threshold from the precision-recall curve of the
+test split.
+
+Unlike the notebook, ``n_estimators`` is not searched. Every candidate boosts
+for up to ``MAX_ESTIMATORS`` rounds with early stopping on a validation slice
+of the training split, and the final model is refitted with the best number of
+rounds. Candidates run in parallel threads (XGBoost releases the GIL), so
+peak RSS covers the whole search. ``--search halving`` replaces the grid with
+a time-budgeted, resumable successive-halving search (see ``cardiocare.search``).
+
+Each run writes ``<artifact>.<version><ext>`` for the model and the scaler, and
+``<model artifact>.<version>.metrics.json``, into ``exported_models/``. The
+metrics hold the test metrics, the chosen parameters, wall time per phase and
+peak RSS. ``--promote`` copies the run over the artifacts the app loads and
+refreshes the native booster and the golden sample.
+
+Usage::
+
+    python -m cardiocare.train early
+    python -m cardiocare.train all --n-jobs 4 --promote
+    python -m cardiocare.train early --search halving --budget 120    # rerun to resume
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost as xgb
+from sklearn.metrics import confusion_matrix, f1_score, precision_recall_curve, precision_score, recall_score
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from cardiocare.fused import BUNDLED_CSVS, risk_labels
+from cardiocare.models import MODEL_DIR, MODEL_FILES, metrics_path
+from cardiocare.search import grid_search, halving_search
+
+# Share of the training split held out for early stopping
+VALIDATION_SIZE = 0.1
+
+# Model -> data, target, artifacts and search space (as in hdt.ipynb)
+TRAINING_SPECS = {
+    "early": {
+        "csv": BUNDLED_CSVS[0],
+        "target": "early_hd_warning",
+        "drop": ["year"],
+        "model": "early_model",
+        "scaler": "scaler",
+        "native": "early_native",
+        "smote": True,
+        "scoring": "f1",
+        "params": {"eval_metric": "logloss"},
+        "grid": {
+            "max_depth": [4, 5, 6],
+            "learning_rate": [0.01, 0.05, 0.1],
+            "subsample": [0.8, 1.0]
+        }
+    },
+    "hd": {
+        "csv": BUNDLED_CSVS[1],
+        "target": "heart_disease",
+        "drop": ["year"],
+        "model": "hd_model",
+        "scaler": "scaler_hd",
+        "native": "hd_native",
+        "smote": False,
+        "scoring": "average_precision",
+        "params": {"colsample_bytree": 0.8, "min_child_weight": 1, "gamma": 0, "reg_alpha": 0.1,
+                   "reg_lambda": 1, "max_delta_step": 1, "eval_metric": "aucpr"},
+        "grid": {
+            "max_depth": [4, 5, 6],
+            "learning_rate": [0.03, 0.1],
+            "subsample": [0.9]
+        }
+    }
+}
+
+
+def reset_peak_rss():
+    """Restart the peak RSS count where the kernel allows it (Linux ``clear_refs``)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """Peak resident set size in MB since ``reset_peak_rss`` (or process start); ``None`` if unknown."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        # Unix only
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def f1_threshold(y_true, prob):
+    """Decision threshold maximizing F1 on the precision-recall curve, as tuned in hdt.ipynb."""
+    precision, recall, thresholds = precision_recall_curve(y_true, prob)
+    f1_scores = 2 * (precision * recall) / (precision + recall + 1e-6)
+    return float(thresholds[np.argmax(f1_scores[:-1])])
+
+
+def evaluate(y_true, prob, threshold):
+    """Test metrics of ``prob`` with labels at ``prob >= threshold``."""
+    pred = risk_labels(prob, threshold)
+    return {
+        "threshold": threshold,
+        "roc_auc": float(roc_auc_score(y_true, prob)),
+        "f1": float(f1_score(y_true, pred)),
+        "precision": float(precision_score(y_true, pred)),
+        "recall": float(recall_score(y_true, pred)),
+        "confusion_matrix": confusion_matrix(y_true, pred).tolist()
+    }
+
+
+def load_training_data(spec, data_path=None):
+    """``(X, y)`` from the model's CSV, without the target and dropped columns."""
+    df = pd.read_csv(data_path or spec["csv"])
+    return df.drop(columns=[spec["target"], *spec["drop"]], errors="ignore"), df[spec["target"]]
+
+
+def _resample(spec, X, y, seed):
+    if not spec["smote"]:
+        return X, y
+    try:
+        from imblearn.over_sampling import SMOTE
+    except ImportError as e:
+        raise ImportError("Training the early-warning model needs imbalanced-learn: "
+                          "pip install imbalanced-learn") from e
+    return SMOTE(random_state=seed).fit_resample(X, y)
+
+
+def artifact_paths(name, version, out_dir=MODEL_DIR):
+    """Versioned ``{"model", "scaler", "metrics"}`` paths of a training run."""
+    spec = TRAINING_SPECS[name]
+    paths = {}
+    for key in ("model", "scaler"):
+        stem, ext = os.path.splitext(MODEL_FILES[spec[key]])
+        paths[key] = os.path.join(out_dir, f"{stem}.{version}{ext}")
+    stem = os.path.splitext(MODEL_FILES[spec["model"]])[0]
+    paths["metrics"] = os.path.join(out_dir, f"{stem}.{version}.metrics.json")
+    return paths
+
+
+def train(name, data_path=None, out_dir=MODEL_DIR, n_jobs=-1, seed=42, cv=3, version=None, search="grid",
+          budget=None, checkpoint=None):
+    """Train model ``name`` (``"early"`` or ``"hd"``) and write its versioned artifacts.
+
+    ``search`` is ``"grid"`` (``cv``-fold grid search) or ``"halving"``, which
+    honours ``budget`` (seconds) and keeps its trials in ``checkpoint`` (default:
+    ``<model artifact>.search.db`` in ``out_dir``). Returns the metrics dict,
+    which is also written as JSON next to the artifacts.
+    """
+    spec = TRAINING_SPECS[name]
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    timings = {}
+    reset_peak_rss()
+    start = phase = time.perf_counter()
+
+    X, y = load_training_data(spec, data_path)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=seed)
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    scale_pos_weight = float(y_train.value_counts()[0] / y_train.value_counts()[1])
+
+    X_fit, X_valid, y_fit, y_valid = train_test_split(X_train_scaled, y_train, test_size=VALIDATION_SIZE,
+                                                      stratify=y_train, random_state=seed)
+    X_fit, y_fit = _resample(spec, X_fit, y_fit, seed)
+    timings["prepare_s"], phase = time.perf_counter() - phase, time.perf_counter()
+
+    base_params = {**spec["params"], "scale_pos_weight": scale_pos_weight, "random_state": seed}
+    if search == "halving":
+        checkpoint = checkpoint or os.path.join(out_dir, os.path.splitext(MODEL_FILES[spec["model"]])[0] + ".search.db")
+        best_params, best_rounds, search_info = halving_search(spec, X_fit, y_fit, X_valid, y_valid, base_params,
+                                                               n_jobs, checkpoint, budget, seed)
+    else:
+        best_params, best_rounds, search_info = grid_search(spec, X_fit, y_fit, X_valid, y_valid, base_params,
+                                                            n_jobs, cv)
+    timings["search_s"], phase = time.perf_counter() - phase, time.perf_counter()
+
+    # Refit without early stopping so every saved tree is used by every backend
+    X_train_res, y_train_res = _resample(spec, X_train_scaled, y_train, seed)
+    model = XGBClassifier(**{**base_params, **best_params}, n_estimators=best_rounds, n_jobs=n_jobs)
+    model.fit(X_train_res, y_train_res)
+    timings["fit_s"], phase = time.perf_counter() - phase, time.perf_counter()
+
+    prob = model.predict_proba(X_test_scaled)[:, 1]
+    metrics = evaluate(y_test, prob, f1_threshold(y_test, prob))
+    timings["evaluate_s"] = time.perf_counter() - phase
+
+    paths = artifact_paths(name, version, out_dir)
+    joblib.dump(model, paths["model"])
+    joblib.dump(scaler, paths["scaler"])
+    timings["total_s"] = time.perf_counter() - start
+
+    result = {
+        "model": name,
+        "version": version,
+        "data": {"path": os.path.abspath(data_path or spec["csv"]), "rows": len(X), "train_rows": len(X_train),
+                 "test_rows": len(X_test), "positive_rate": float(y.mean())},
+        "params": {**base_params, **best_params, "n_estimators": best_rounds},
+        "search": search_info,
+        "test": metrics,
+        "timings": timings,
+        "peak_rss_mb": peak_rss_mb(),
+        "environment": {"python": platform.python_version(), "xgboost": xgb.__version__,
+                        "sklearn": sklearn.__version__, "cpus": os.cpu_count(), "n_jobs": n_jobs},
+        "artifacts": {key: os.path.basename(path) for key, path in paths.items() if key != "metrics"}
+    }
+    with open(paths["metrics"], "w") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def previous_metrics(name, version, out_dir=MODEL_DIR):
+    """Metrics of the latest run of ``name`` before ``version``, or ``None``."""
+    pattern = artifact_paths(name, "*", out_dir)["metrics"]
+    earlier = sorted(path for path in glob.glob(pattern) if path < artifact_paths(name, version, out_dir)["metrics"])
+    if not earlier:
+        return None
+    with open(earlier[-1]) as f:
+        return json.load(f)
+
+
+def promote(name, version, out_dir=MODEL_DIR):
+    """Copy a run's artifacts over the ones the app loads and refresh the native booster and golden sample.
+
+    The run's metrics are copied to ``cardiocare.models.metrics_path``, where
+    every backend and ``cardiocare.batch`` read the tuned threshold from.
+    """
+    from cardiocare.backends import write_golden
+    from cardiocare.native import export_native
+
+    spec = TRAINING_SPECS[name]
+    paths = artifact_paths(name, version, out_dir)
+    with open(paths["metrics"]) as f:
+        threshold = json.load(f)["test"]["threshold"]
+    targets = {key: os.path.join(out_dir, MODEL_FILES[spec[key]]) for key in ("model", "scaler")}
+    targets["metrics"] = metrics_path(spec["model"], out_dir)
+    for key, target in targets.items():
+        shutil.copyfile(paths[key], target + ".tmp")
+        os.replace(target + ".tmp", target)
+    export_native(joblib.load(paths["model"]), joblib.load(paths["scaler"]),
+                  os.path.join(out_dir, MODEL_FILES[spec["native"]]), threshold)
+    write_golden(out_dir)
+
+
+def _delta(current, previous):
+    return f" ({current - previous:+.3g})" if current is not None and previous is not None else ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the CardioCare models from the bundled CSVs.")
+    parser.add_argument("model", choices=[*TRAINING_SPECS, "all"])
+    parser.add_argument("--data", help="Training CSV (default: the bundled CSV of the model; not with all)")
+    parser.add_argument("--out-dir", default=MODEL_DIR)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel search candidates (-1: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--search", choices=["grid", "halving"], default="grid")
+    parser.add_argument("--budget", type=float, help="Seconds of halving search before it stops starting trials")
+    parser.add_argument("--checkpoint", help="SQLite file of finished halving trials (resumed when rerun)")
+    parser.add_argument("--promote", action="store_true",
+                        help="Replace the artifacts the app loads with this run's")
+    args = parser.parse_args(argv)
+    if args.model == "all" and args.data:
+        # Each model has its own columns and target
+        parser.error("--data names one model's CSV; train the models one at a time to use it")
+
+    names = list(TRAINING_SPECS) if args.model == "all" else [args.model]
+    for name in names:
+        result = train(name, args.data, args.out_dir, args.n_jobs, args.seed, search=args.search,
+                       budget=args.budget, checkpoint=args.checkpoint)
+        previous = previous_metrics(name, result["version"], args.out_dir) or {}
+        test, previous_test = result["test"], previous.get("test", {})
+        total, previous_total = result["timings"]["total_s"], previous.get("timings", {}).get("total_s")
+        print(f"{name}: version {result['version']}, {result['params']['n_estimators']} rounds, "
+              f"threshold {test['threshold']:.4f}")
+        search = result["search"]
+        if search["method"] == "halving":
+            print(f"  halving: rung {search['rung_reached'] + 1}/{len(search['rungs'])}, {search['trials']} trials "
+                  f"({search['resumed_trials']} resumed){'' if search['complete'] else ', incomplete: rerun to resume'}")
+        print(f"  ROC AUC {test['roc_auc']:.4f}{_delta(test['roc_auc'], previous_test.get('roc_auc'))}   "
+              f"F1 {test['f1']:.4f}{_delta(test['f1'], previous_test.get('f1'))}")
+        peak, previous_peak = result["peak_rss_mb"], previous.get("peak_rss_mb")
+        print(f"  wall {total:.1f} s{_delta(total, previous_total)}   "
+              + (f"peak RSS {peak:.0f} MB{_delta(peak, previous_peak)}" if peak is not None else "peak RSS unknown"))
+        print(f"  wrote {', '.join(result['artifacts'].values())} and metrics to {args.out_dir}")
+        if args.promote:
+            promote(name, result["version"], args.out_dir)
+            print(f"  promoted {result['version']} with threshold {test['threshold']:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
-from sklearn.preprocessing import StandardScaler
-import os
+
+from cardiocare.assets import stylesheet, template
+from cardiocare.backends import load_model
+from cardiocare.models import MODEL_DIR, ModelRegistry
 
 # === PAGE CONFIGURATION ===
 st.set_page_config(
@@ -13,249 +13,37 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for healthcare theme
-st.markdown("""
-<style>
-    /* Main theme colors */
-    :root {
-        --primary: #005f73;
-        --secondary: #0a9396;
-        --accent: #94d2bd;
-        --light: #e9d8a6;
-        --alert: #ae2012;
-    }
-
-    /* Main container */
-    .stApp {
-        background-color: #f8f9fa;
-    }
-
-    /* Headers */
-    h1, h2, h3 {
-        color: var(--primary) !important;
-        font-family: 'Arial', sans-serif;
-    }
-
-    /* Sidebar */
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, var(--primary), var(--secondary)) !important;
-        color: white !important;
-    }
-
-    /* Buttons */
-    .stButton>button {
-        background-color: var(--secondary) !important;
-        color: white !important;
-        border-radius: 8px !important;
-        padding: 8px 16px !important;
-        font-weight: 500 !important;
-    }
-
-    .stButton>button:hover {
-        background-color: var(--primary) !important;
-    }
-
-    /* Forms */
-    .stForm {
-        background-color: white !important;
-        border-radius: 12px !important;
-        padding: 20px !important;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.1) !important;
-    }
-
-    /* Input widgets */
-    .stNumberInput, .stSelectbox, .stSlider, .stTextInput {
-        border-radius: 8px !important;
-    }
-
-    /* Success message */
-    .stAlert.success {
-        background-color: #d4edda !important;
-        color: #155724 !important;
-        border-radius: 8px !important;
-    }
-
-    /* Error message */
-    .stAlert.error {
-        background-color: #f8d7da !important;
-        color: #721c24 !important;
-        border-radius: 8px !important;
-    }
-
-    /* Custom cards */
-    .custom-card {
-        background: white;
-        border-radius: 12px;
-        padding: 20px;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-    }
-
-    /* Risk indicator */
-    .risk-indicator {
-        width: 100%;
-        height: 30px;
-        border-radius: 15px;
-        background: linear-gradient(90deg, #4CAF50, #FFC107, #F44336);
-        margin: 10px 0;
-        position: relative;
-    }
-
-    .risk-marker {
-        position: absolute;
-        width: 4px;
-        height: 40px;
-        background: black;
-        top: -5px;
-        transform: translateX(-50%);
-    }
-</style>
-""", unsafe_allow_html=True)
+# Theme stylesheet, linked from static/ so reruns do not resend it
+st.markdown(stylesheet("ht.css", st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
 
 
 @st.cache_resource
-def load_models(base_dir=r"C:\Users\yuvra\PycharmProjects\hd2\exported_models"):
-    files = {
-        "early_model": "xgb_early_hd_model.joblib",
-        "hd_model": "heart_disease_model_final.pkl",
-        "scaler": "scaler_hd.joblib",
-        "scaler_hd": "scaler_final.pkl"
-    }
+def load_models(base_dir=MODEL_DIR):
+    # Scalers, models and tuned thresholds on the configured backend (CARDIOCARE_BACKEND),
+    # checked against the golden sample as in hp.py (see cardiocare.backends)
     try:
-        for name, fname in files.items():
-            if not os.path.exists(os.path.join(base_dir, fname)):
-                raise FileNotFoundError(f"Missing: {fname}")
-
-        early_model = joblib.load(os.path.join(base_dir, files["early_model"]))
-        hd_model = joblib.load(os.path.join(base_dir, files["hd_model"]))
-        scaler = joblib.load(os.path.join(base_dir, files["scaler"]))
-        scaler_hd = joblib.load(os.path.join(base_dir, files["scaler_hd"]))
-
-        return early_model, hd_model, scaler, scaler_hd
+        registry = ModelRegistry(base_dir)
+        return load_model(registry, "early"), load_model(registry, "hd")
     except Exception as e:
         st.error(f"Error loading models: {str(e)}")
         st.stop()
 
 
 # Load models
-early_model, hd_model, scaler, scaler_hd = load_models()
+early_fused, hd_fused = load_models()
 
 # === SIDEBAR ===
 with st.sidebar:
-    st.markdown("""
-    <style>
-        [data-testid="stSidebar"] * {
-            color: white !important;
-        }
-        [data-testid="stSidebar"] .stRadio div[data-baseweb="radio"] label {
-            color: white !important;
-            font-weight: 500;
-        }
-    </style>
-    <div style='text-align: center; margin-bottom: 20px;'>
-        <img src='https://img.icons8.com/color/96/000000/heart-health.png' width='80'>
-        <h1 style='color: white !important; font-weight: 600;'>CardioCare AI</h1>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(template("ht_sidebar_header.html"), unsafe_allow_html=True)
 
     app_mode = st.radio("Navigation", ["Home", "Early Warning", "Heart Disease"])
 
-    st.markdown("---")
-    st.markdown("""
-    <div>
-    <h4>About</h4>
-    <p>Advanced ML-based cardiac risk assessment tool for healthcare professionals.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("""
-    <div style='margin-top: 20px;'>
-    <p>Developed by</p>
-    <p>Yuvraj Kumar Gond</p>
-    <p>Version 2.1.0</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(template("ht_sidebar_footer.html"), unsafe_allow_html=True)
 
 # === HOME ===
 if app_mode == "Home":
-    st.title("❤️ CardioCare AI - Heart Health Prediction")
-
-    st.markdown("""
-    <div class='custom-card'>
-        <h3>Advanced ML-Based Cardiac Risk Prediction</h3>
-        <p>This clinical decision support tool predicts early signs of heart disease and overall cardiovascular risk 
-        using machine learning models trained on extensive clinical datasets.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("---")
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("""
-        <div class='custom-card'>
-            <h3>Key Features</h3>
-            <ul style='padding-left: 20px;'>
-                <li>Early warning prediction system</li>
-                <li>Comprehensive heart disease risk assessment</li>
-                <li>Uses XGBoost and Random Forest algorithms</li>
-                <li>Clinical decision support tool</li>
-                <li>Risk factor visualization</li>
-                <li>Personalized recommendations</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        st.markdown("""
-        <div class='custom-card'>
-            <h3>Dataset Features</h3>
-            <div style='display: grid; grid-template-columns: 1fr 1fr; gap: 10px;'>
-                <div>
-                    <h4>Clinical</h4>
-                    <ul style='padding-left: 20px;'>
-                        <li>Age, Sex</li>
-                        <li>Blood Pressure</li>
-                        <li>Cholesterol</li>
-                        <li>Blood Sugar</li>
-                        <li>ST depression</li>
-                    </ul>
-                </div>
-                <div>
-                    <h4>Lifestyle</h4>
-                    <ul style='padding-left: 20px;'>
-                        <li>BMI</li>
-                        <li>Smoking</li>
-                        <li>Alcohol</li>
-                        <li>Activity</li>
-                        <li>Stress</li>
-                        <li>Diet</li>
-                    </ul>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    st.markdown("---")
-    st.markdown("""
-    <div class='custom-card'>
-        <h3>How It Works</h3>
-        <div style='display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; text-align: center;'>
-            <div>
-                <h4>1. Input Data</h4>
-                <p>Enter patient clinical and lifestyle information</p>
-            </div>
-            <div>
-                <h4>2. AI Analysis</h4>
-                <p>Our models process the data using advanced algorithms</p>
-            </div>
-            <div>
-                <h4>3. Get Results</h4>
-                <p>Receive risk assessment with actionable insights</p>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Static page, sent as one element the browser can cache across reruns
+    st.markdown(template("ht_home.html"), unsafe_allow_html=True)
 
 # === EARLY WARNING ===
 elif app_mode == "Early Warning":
@@ -329,13 +117,9 @@ elif app_mode == "Early Warning":
                 'diet_score': diet_score
             }
 
-            # Create DataFrame and scale features
-            input_df = pd.DataFrame([input_dict])
-            scaled_input = scaler.transform(input_df)
-
-            # Make prediction
-            pred = early_model.predict(scaled_input)[0]
-            prob = early_model.predict_proba(scaled_input)[0][1]
+            # Scale features and predict in one fused pass
+            prob = float(early_fused.predict_proba(early_fused.row(input_dict))[0])
+            pred = early_fused.label(prob)
 
             # Display results
             st.markdown("---")
@@ -502,13 +286,9 @@ elif app_mode == "Heart Disease":
                 'diet_score': diet_score
             }
 
-            # Create DataFrame and scale features
-            input_df = pd.DataFrame([input_dict])
-            scaled_input = scaler_hd.transform(input_df)
-
-            # Make prediction
-            pred = hd_model.predict(scaled_input)[0]
-            prob = hd_model.predict_proba(scaled_input)[0][1]
+            # Scale features and predict in one fused pass
+            prob = float(hd_fused.predict_proba(hd_fused.row(input_dict))[0])
+            pred = hd_fused.label(prob)
 
             # Display results
             st.markdown("---")
@@ -0,0 +1,62 @@
+"""The fused scaler + booster path against ``scaler.transform`` + ``predict_proba`` on a DataFrame."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cardiocare.fused import BUNDLED_CSVS, FusedModel
+from cardiocare.models import load_artifacts
+
+MODELS = ["early_model", "hd_model"]
+ROW_SAMPLE = 200
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    early_model, hd_model, scaler, scaler_hd = load_artifacts()
+    return {"early_model": (early_model, scaler), "hd_model": (hd_model, scaler_hd)}
+
+
+@pytest.fixture(scope="module", params=BUNDLED_CSVS, ids=os.path.basename)
+def csv_frame(request):
+    return pd.read_csv(request.param)
+
+
+def _features(fused, df):
+    missing = sorted(set(fused.feature_names) - set(df.columns))
+    if missing:
+        pytest.skip(f"CSV lacks the model's columns {missing}")
+    return df[fused.feature_names]
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_fused_matches_dataframe_path(artifacts, csv_frame, name):
+    model, scaler = artifacts[name]
+    fused = FusedModel.from_artifacts(model, scaler)
+    features = _features(fused, csv_frame)
+    scaled = scaler.transform(features)
+
+    np.testing.assert_array_equal(fused.predict_proba(features.to_numpy()), model.predict_proba(scaled)[:, 1])
+    np.testing.assert_array_equal(fused.predict(features.to_numpy()), model.predict(scaled))
+
+
+@pytest.mark.parametrize("name", MODELS)
+def test_fused_row_matches_dataframe_path(artifacts, csv_frame, name):
+    # The app scores one form submit at a time through row()
+    model, scaler = artifacts[name]
+    fused = FusedModel.from_artifacts(model, scaler)
+    features = _features(fused, csv_frame).head(ROW_SAMPLE)
+
+    for input_dict in features.to_dict("records"):
+        expected = model.predict_proba(scaler.transform(pd.DataFrame([input_dict])))[0, 1]
+        assert fused.predict_proba(fused.row(input_dict))[0] == expected
+
+
+def test_label_is_positive_at_the_threshold(artifacts):
+    # Thresholds are tuned with prob >= threshold (cardiocare.train.evaluate)
+    model, scaler = artifacts["early_model"]
+    fused = FusedModel.from_artifacts(model, scaler, threshold=0.57)
+    assert fused.label(0.57) == 1
+    assert fused.label(np.float32(0.56)) == 0
+    np.testing.assert_array_equal(fused.label(np.array([0.5, 0.57, 0.9])), [0, 1, 1])
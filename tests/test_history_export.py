@@ -0,0 +1,79 @@
+"""Streamed patient history export: contents per format and memory at 1M rows."""
+import re
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from cardiocare.history import EXPORT_FORMATS, HistoryStore
+
+# Growth in peak RSS allowed between exporting 1k and 1M rows. Holding 1M rows
+# as Python objects or a DataFrame takes several hundred MB; one 50k-row chunk
+# and the writers' buffers stay well under this.
+MEMORY_CEILING_MB = 128
+
+# Synthetic rows generated inside SQLite; inserting 1M rows from Python takes twice as long
+INSERT_ROWS_SQL = """
+WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i + 1 < ?)
+INSERT INTO assessments (id, name, age, sex, risk_level, probability, timestamp, mode)
+SELECT printf('P%05d', i % 5000), printf('Patient %d', i % 5000), 20 + i % 60,
+       CASE i % 2 WHEN 0 THEN 'Female' ELSE 'Male' END, CASE i % 3 WHEN 0 THEN 'High' ELSE 'Low' END,
+       (i % 1000) / 1000.0,
+       printf('2025-%02d-%02d %02d:%02d:%02d.%07d', 1 + i % 12, 1 + i % 28, i % 24, i % 60, i / 60 % 60, i),
+       CASE i % 2 WHEN 0 THEN 'Heart Disease' ELSE 'Early Warning' END
+FROM seq
+"""
+
+
+def _history(path, rows):
+    store = HistoryStore(str(path))
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute(INSERT_ROWS_SQL, (rows,))
+    return store
+
+
+def _read(path, fmt):
+    return pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path)
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_export_matches_frame(tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    store = _history(tmp_path / "history.db", 1000)
+    output = tmp_path / f"history.{EXPORT_FORMATS[fmt][0]}"
+
+    assert store.export(str(output), fmt, chunk_size=64, mode="Early Warning") == 500
+    exported = _read(output, fmt)
+    expected = store.frame(mode="Early Warning")
+    expected["probability"] *= 100
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False)
+
+
+def _export_peak_mb(db_path, output, fmt):
+    # A fresh interpreter, so the peak covers the export alone
+    result = subprocess.run([sys.executable, "-m", "cardiocare.history", str(output), "--db", str(db_path),
+                             "--format", fmt], capture_output=True, text=True, check=True)
+    return float(re.search(r"peak RSS (\d+) MB", result.stderr).group(1))
+
+
+@pytest.mark.slow
+def test_export_memory_is_flat_in_history_size(tmp_path):
+    pytest.importorskip("resource", reason="peak RSS is read with the Unix resource module")
+    formats = [fmt for fmt in EXPORT_FORMATS if fmt != "parquet"]
+    try:
+        import pyarrow  # noqa: F401
+        formats.append("parquet")
+    except ImportError:
+        pass
+
+    small, large = tmp_path / "small.db", tmp_path / "large.db"
+    _history(small, 1000)
+    _history(large, 1_000_000)
+    for fmt in formats:
+        output = tmp_path / f"history.{EXPORT_FORMATS[fmt][0]}"
+        baseline = _export_peak_mb(small, output, fmt)
+        peak = _export_peak_mb(large, output, fmt)
+        assert peak - baseline < MEMORY_CEILING_MB, f"{fmt}: {baseline:.0f} MB at 1k rows, {peak:.0f} MB at 1M rows"
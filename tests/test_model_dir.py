@@ -0,0 +1,34 @@
+"""Serving from a model directory other than the repo's ``exported_models``."""
+import json
+import shutil
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from cardiocare.models import MODEL_DIR, metrics_path
+from cardiocare.service import create_app
+from cardiocare.train import TRAINING_SPECS, promote, train
+
+
+@pytest.fixture(scope="module")
+def promoted_dir(tmp_path_factory):
+    # promote() rewrites the golden sample of both models, so start from a copy of the repo's
+    model_dir = tmp_path_factory.mktemp("models") / "exported_models"
+    shutil.copytree(MODEL_DIR, model_dir)
+    result = train("hd", out_dir=str(model_dir), n_jobs=2, version="test")
+    promote("hd", result["version"], str(model_dir))
+    return model_dir
+
+
+def test_app_serves_promoted_models(promoted_dir):
+    with open(metrics_path(TRAINING_SPECS["hd"]["model"], str(promoted_dir))) as f:
+        threshold = json.load(f)["test"]["threshold"]
+
+    with TestClient(create_app(base_dir=str(promoted_dir))) as client:
+        fused = client.app.state.scorer.models["heart-disease"]
+        patient = pd.read_csv(TRAINING_SPECS["hd"]["csv"])[fused.feature_names].iloc[0].to_dict()
+        response = client.post("/predict/heart-disease", json=patient)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["threshold"] == pytest.approx(threshold)